@@ -1,13 +1,18 @@
 # agent_graph.py
 import operator
+import threading
 from typing import TypedDict, Annotated, Sequence
 
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_groq import ChatGroq
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage, message_chunk_to_message
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 
 import config
+from checkpointing import get_checkpointer
+from conversation_memory import prepare_messages_for_llm
+from instrumentation import traced_node
+from llm_registry import get_llm
+from tool_executor import ParallelToolNode
 from tools_definition import ALL_TOOLS
 
 class AgentState(TypedDict):
@@ -46,22 +51,42 @@ Carefully read their descriptions (which you will receive) to understand their p
 Always aim to be helpful and accurate.
 """
 
-if not config.GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY not found in environment or config.py. Please set it.")
-
-main_llm = ChatGroq(
-    groq_api_key=config.GROQ_API_KEY,
-    model_name=config.GROQ_MODEL_NAME,
-    temperature=config.LLM_TEMPERATURE
-)
+_bound_llm_lock = threading.Lock()
+_bound_llm_pair = (None, None)
+
+def get_llm_with_tools():
+    """Binds ALL_TOOLS to the shared registry LLM once and reuses the binding until the LLM changes."""
+    global _bound_llm_pair
+    llm = get_llm()
+    with _bound_llm_lock:
+        if _bound_llm_pair[0] is not llm:
+            _bound_llm_pair = (llm, llm.bind_tools(ALL_TOOLS))
+        return _bound_llm_pair[1]
+
+def call_llm(bound_llm, messages, run_config: RunnableConfig) -> AIMessage:
+    """Calls the LLM through its streaming API (so tokens reach LangGraph's message stream) and returns the full message."""
+    if not config.STREAMING_ENABLED:
+        return bound_llm.invoke(messages, run_config)
+    response = None
+    for chunk in bound_llm.stream(messages, run_config):
+        response = chunk if response is None else response + chunk
+    return message_chunk_to_message(response)
+
+@traced_node("agent")
+def agent_node(state: AgentState, config: RunnableConfig):
+    response = call_llm(get_llm_with_tools(), prepare_messages_for_llm(state["messages"], config), config)
+    return {"messages": [response]}
 
-llm_with_tools = main_llm.bind_tools(ALL_TOOLS)
+def make_agent_node(llm):
+    bound_llm = llm.bind_tools(ALL_TOOLS)
 
-def agent_node(state: AgentState):
-    response = llm_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
+    @traced_node("agent")
+    def custom_agent_node(state: AgentState, config: RunnableConfig):
+        response = call_llm(bound_llm, prepare_messages_for_llm(state["messages"], config), config)
+        return {"messages": [response]}
+    return custom_agent_node
 
-tool_node = ToolNode(ALL_TOOLS)
+tool_node = ParallelToolNode(ALL_TOOLS)
 
 def router_node(state: AgentState) -> str:
     last_message = state["messages"][-1]
@@ -70,9 +95,13 @@ def router_node(state: AgentState) -> str:
     else:
         return END
 
-def create_agent_graph() -> StateGraph:
+def create_agent_graph(llm=None, checkpointer=None) -> StateGraph:
+    """
+    Compiles the agent graph. With a `checkpointer` (see checkpointing.py) state is persisted per
+    configurable `thread_id`, so each turn only needs to pass the new messages.
+    """
     workflow = StateGraph(AgentState)
-    workflow.add_node("agent", agent_node)
+    workflow.add_node("agent", agent_node if llm is None else make_agent_node(llm))
     workflow.add_node("tools", tool_node)
     workflow.set_entry_point("agent")
     workflow.add_conditional_edges(
@@ -81,7 +110,22 @@ def create_agent_graph() -> StateGraph:
         {"tools": "tools", END: END}
     )
     workflow.add_edge("tools", "agent")
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
     return app
 
-compiled_agent_graph = create_agent_graph()
\ No newline at end of file
+_compiled_agent_graph = None
+_compiled_agent_graph_lock = threading.Lock()
+
+def get_compiled_agent_graph():
+    """Builds the default agent graph on first use so importing this module stays cheap."""
+    global _compiled_agent_graph
+    with _compiled_agent_graph_lock:
+        if _compiled_agent_graph is None:
+            _compiled_agent_graph = create_agent_graph(checkpointer=get_checkpointer())
+        return _compiled_agent_graph
+
+def __getattr__(name):
+    # Keeps `from agent_graph import compiled_agent_graph` working while building it lazily.
+    if name == "compiled_agent_graph":
+        return get_compiled_agent_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
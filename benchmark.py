@@ -0,0 +1,297 @@
+# benchmark.py
+"""Offline performance benchmark for the agent graph, its tools and the turn loop.
+
+The Groq model is replaced by the scripted fake chat model (with configurable latency) and
+web_search by a local stand-in corpus, so results are reproducible without network access.
+
+Usage:
+    python benchmark.py --turns 50 --concurrency 4 --output bench.json
+    python benchmark.py --scenarios single_tool,multi_tool --llm-latency 0.2
+
+The JSON report can be compared between commits to catch regressions.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import config
+
+SEARCH_CORPUS = [
+    {"title": "Paris - Wikipedia", "href": "https://en.wikipedia.org/wiki/Paris", "body": "Paris is the capital and largest city of France."},
+    {"title": "France - Wikipedia", "href": "https://en.wikipedia.org/wiki/France", "body": "France is a country in Western Europe. Its capital is Paris."},
+    {"title": "Photosynthesis - Wikipedia", "href": "https://en.wikipedia.org/wiki/Photosynthesis", "body": "Photosynthesis is the process plants use to convert light into chemical energy."},
+]
+
+def _large_document(paragraphs: int = 400) -> str:
+    return "\n\n".join(
+        f"Paragraph {i}. Photosynthesis converts light energy into chemical energy stored in glucose. " * 6
+        for i in range(paragraphs)
+    )
+
+def _long_history(turns: int = 20) -> list:
+    history = []
+    for i in range(turns):
+        call_id = f"history_call_{i}"
+        history.extend([
+            HumanMessage(content=f"Question {i}: what is the capital of France and what is {i} * 76?"),
+            AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"query": "capital of France"}, "id": call_id}]),
+            ToolMessage(content=json.dumps(SEARCH_CORPUS * 15), tool_call_id=call_id, name="web_search"),
+            AIMessage(content=f"The capital of France is Paris and {i} * 76 = {i * 76}."),
+        ])
+    return history
+
+SCENARIOS = {
+    "single_tool": {
+        "prompt": "What is 25 * 76?",
+        "script": [{"tool_calls": [{"name": "calculator", "args": {"expression": "25 * 76"}}]}, "25 * 76 = 1900."],
+    },
+    "multi_tool": {
+        "prompt": "What's the capital of France and what's 25 * 76?",
+        "script": [
+            {"tool_calls": [
+                {"name": "web_search", "args": {"query": "capital of France"}},
+                {"name": "calculator", "args": {"expression": "25 * 76"}},
+            ]},
+            "The capital of France is Paris, and 25 * 76 = 1900.",
+        ],
+    },
+    "long_history": {
+        "prompt": "And what is 26 * 76?",
+        "history": _long_history,
+        "memory": True,
+        "script": [{"tool_calls": [{"name": "calculator", "args": {"expression": "26 * 76"}}]}, "26 * 76 = 1976."],
+    },
+    "large_document": {
+        "prompt": "Summarize this article about photosynthesis.",
+        "script": [
+            {"tool_calls": [{"name": "document_summarizer", "args": {"text_content": _large_document(), "query_context": "photosynthesis"}}]},
+            "Photosynthesis turns light into chemical energy.",
+        ],
+    },
+}
+
+class TimingCallback(BaseCallbackHandler):
+    """Collects wall-clock durations of graph nodes, LLM calls and tool calls for one turn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._starts: Dict[object, tuple] = {}
+        self.node_seconds: Dict[str, float] = {}
+        self.llm_seconds: Dict[str, float] = {}
+        self.tool_seconds: Dict[str, List[float]] = {}
+
+    def _start(self, run_id, kind, name):
+        with self._lock:
+            self._starts[run_id] = (kind, name, time.perf_counter())
+
+    def _end(self, run_id):
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+            if started is None:
+                return
+            kind, name, t0 = started
+            elapsed = time.perf_counter() - t0
+            if kind == "node":
+                self.node_seconds[name] = self.node_seconds.get(name, 0.0) + elapsed
+            elif kind == "llm":
+                self.llm_seconds[name] = self.llm_seconds.get(name, 0.0) + elapsed
+            else:
+                self.tool_seconds.setdefault(name, []).append(elapsed)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        # LLM time is attributed to the graph node it ran in (the summarizer's calls happen inside "tools").
+        self._start(run_id, "llm", (metadata or {}).get("langgraph_node"))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", (serialized or {}).get("name", "unknown_tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def _initial_state(scenario: dict) -> dict:
+    from agent_graph import agent_system_message_content
+    history = scenario["history"]() if "history" in scenario else []
+    return {"messages": [SystemMessage(content=agent_system_message_content)] + history + [HumanMessage(content=scenario["prompt"])]}
+
+def _run_one_turn(graph, scenario: dict) -> dict:
+    from conversation_memory import ConversationMemory
+    from turn_runner import run_turn
+
+    timing = TimingCallback()
+    configurable = {"conversation_memory": ConversationMemory()} if scenario.get("memory") else None
+    initial_state = _initial_state(scenario)
+    started = time.perf_counter()
+    turn_result = run_turn(graph, initial_state, configurable=configurable, callbacks=[timing])
+    latency = time.perf_counter() - started
+    return {
+        "latency": latency,
+        "ttft": turn_result.time_to_first_token,
+        "timing": timing,
+        "llm_calls": turn_result.llm_calls,
+        "tool_calls": turn_result.tool_invocations,
+    }
+
+def _measure_session_memory_kb(graph, scenario: dict) -> float:
+    tracemalloc.start()
+    try:
+        _run_one_turn(graph, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def run_scenario(name: str, scenario: dict, turns: int, concurrency: int, llm_latency: float) -> dict:
+    from agent_graph import create_agent_graph
+    from fake_llm import ScriptedChatModel
+
+    graph = create_agent_graph(llm=ScriptedChatModel(script=scenario["script"], latency_seconds=llm_latency))
+    _run_one_turn(graph, scenario)  # warm-up: imports, schema building, worker start-up
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(lambda _: _run_one_turn(graph, scenario), range(turns)))
+    wall_seconds = time.perf_counter() - started
+
+    latencies = [r["latency"] for r in runs]
+    ttfts = [r["ttft"] for r in runs if r["ttft"] is not None]
+    node_totals: Dict[str, List[float]] = {}
+    tool_totals: Dict[str, List[float]] = {}
+    overheads, agent_overheads, tools_overheads = [], [], []
+    for r in runs:
+        timing = r["timing"]
+        for node, seconds in timing.node_seconds.items():
+            node_totals.setdefault(node, []).append(seconds)
+        for tool_name, durations in timing.tool_seconds.items():
+            tool_totals.setdefault(tool_name, []).extend(durations)
+        overheads.append(r["latency"] - sum(timing.node_seconds.values()))
+        agent_overheads.append(timing.node_seconds.get("agent", 0.0) - timing.llm_seconds.get("agent", 0.0))
+        # Top-level tool time only: nested LLM calls inside tools (summarizer) are part of the tool.
+        tool_time = max((sum(d) for d in timing.tool_seconds.values()), default=0.0)
+        tools_overheads.append(max(timing.node_seconds.get("tools", 0.0) - tool_time, 0.0))
+
+    return {
+        "turns": turns,
+        "concurrency": concurrency,
+        "throughput_turns_per_s": round(turns / wall_seconds, 3) if wall_seconds else None,
+        "latency_ms": {
+            "mean": _ms(statistics.mean(latencies)),
+            "p50": _ms(percentile(latencies, 50)),
+            "p95": _ms(percentile(latencies, 95)),
+            "p99": _ms(percentile(latencies, 99)),
+        },
+        "time_to_first_token_ms": {
+            "p50": _ms(percentile(ttfts, 50)),
+            "p95": _ms(percentile(ttfts, 95)),
+        } if ttfts else None,
+        "llm_calls_per_turn": statistics.mean(r["llm_calls"] for r in runs),
+        "tool_calls_per_turn": statistics.mean(r["tool_calls"] for r in runs),
+        "node_ms_mean": {node: _ms(statistics.mean(v)) for node, v in node_totals.items()},
+        "overhead_ms_mean": {
+            "graph": _ms(statistics.mean(overheads)),
+            "agent_node_excluding_llm": _ms(statistics.mean(agent_overheads)),
+            "tools_node_excluding_tools": _ms(statistics.mean(tools_overheads)),
+        },
+        "tool_ms": {
+            tool_name: {"calls": len(v), "mean": _ms(statistics.mean(v)), "p95": _ms(percentile(v, 95))}
+            for tool_name, v in tool_totals.items()
+        },
+        "memory_per_session_kb": _measure_session_memory_kb(graph, scenario),
+    }
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark for the multi-tool agent.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+    parser.add_argument("--turns", type=int, default=30, help="Measured turns per scenario.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Turns executed concurrently.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the fake chat model sleeps per call.")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Seconds the stand-in search backend sleeps per call.")
+    parser.add_argument("--with-tool-cache", action="store_true", help="Keep the tool result cache enabled (disabled by default).")
+    parser.add_argument("-o", "--output", default="-", help="Path for the JSON report, or '-' for stdout (default).")
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    from fake_llm import ScriptedChatModel
+    from llm_registry import set_llm_override
+    from search_backends import StaticCorpusBackend, set_search_backend
+
+    config.TOOL_CACHE_ENABLED = args.with_tool_cache
+    set_search_backend(StaticCorpusBackend(SEARCH_CORPUS, latency_seconds=args.search_latency))
+    set_llm_override(ScriptedChatModel(default_response="Photosynthesis turns light into chemical energy.", latency_seconds=args.llm_latency))
+
+    report = {
+        "revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "turns": args.turns,
+            "concurrency": args.concurrency,
+            "llm_latency_s": args.llm_latency,
+            "search_latency_s": args.search_latency,
+            "tool_cache": args.with_tool_cache,
+        },
+        "scenarios": {},
+    }
+    for name in selected:
+        print(f"Running scenario '{name}'...", file=sys.stderr)
+        report["scenarios"][name] = run_scenario(name, SCENARIOS[name], args.turns, args.concurrency, args.llm_latency)
+
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# calculator_engine.py
+"""Safe arithmetic expression engine used by the calculator tools.
+
+Expressions are parsed to an AST once, checked against a whitelist of operators, compiled into
+nested closures and kept in an LRU cache. Evaluation enforces limits on exponents and integer size,
+so inputs like '9**9**9' fail fast instead of hanging the process. Variables (batch mode only) are
+evaluated as NumPy arrays so one compiled expression covers a whole table of values.
+"""
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import config
+
+class CalculatorError(ValueError):
+    pass
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+def _check_size(value):
+    if isinstance(value, int) and value.bit_length() > config.CALCULATOR_MAX_INTEGER_BITS:
+        raise CalculatorError("Result is too large.")
+    return value
+
+def _safe_pow(base, exponent):
+    if isinstance(exponent, np.ndarray):
+        too_large = exponent.size and float(np.max(np.abs(exponent))) > config.CALCULATOR_MAX_EXPONENT
+    else:
+        too_large = abs(exponent) > config.CALCULATOR_MAX_EXPONENT
+    if too_large:
+        raise CalculatorError(f"Exponent exceeds the limit of {config.CALCULATOR_MAX_EXPONENT}.")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if exponent * math.log2(abs(base)) > config.CALCULATOR_MAX_INTEGER_BITS:
+            raise CalculatorError("Result is too large.")
+    return operator.pow(base, exponent)
+
+class CompiledExpression:
+    def __init__(self, expression: str, evaluator: Callable[[Dict[str, Any]], Any], variables: frozenset):
+        self.expression = expression
+        self.variables = variables
+        self._evaluator = evaluator
+        self._constant_result = None
+
+    def evaluate(self, variables: Optional[Dict[str, Any]] = None):
+        missing = self.variables - set(variables or {})
+        if missing:
+            raise CalculatorError(f"Unknown variable(s): {', '.join(sorted(missing))}.")
+        if not self.variables:
+            # Constant expressions are memoized on the cached compiled object.
+            if self._constant_result is None:
+                self._constant_result = self._run({})
+            return self._constant_result
+        env = {name: np.asarray(variables[name], dtype=np.float64) for name in self.variables}
+        return self._run(env)
+
+    def _run(self, env: Dict[str, Any]):
+        try:
+            with np.errstate(divide="raise", over="raise", invalid="raise"):
+                result = self._evaluator(env)
+        except CalculatorError:
+            raise
+        except (ArithmeticError, FloatingPointError, ValueError, TypeError) as e:
+            raise CalculatorError(str(e)) from e
+        # e.g. (-8) ** (1/3): Python returns a complex root, which callers cannot serialize.
+        if isinstance(result, complex):
+            raise CalculatorError("Result is a complex number; only real results are supported.")
+        return result
+
+def _compile_node(node: ast.AST, depth: int, names: set) -> Callable[[Dict[str, Any]], Any]:
+    if depth > config.CALCULATOR_MAX_DEPTH:
+        raise CalculatorError("Expression is nested too deeply.")
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, depth + 1, names)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = _check_size(node.value)
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp):
+        left = _compile_node(node.left, depth + 1, names)
+        right = _compile_node(node.right, depth + 1, names)
+        if isinstance(node.op, ast.Pow):
+            return lambda env: _check_size(_safe_pow(left(env), right(env)))
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Operator '{type(node.op).__name__}' is not allowed.")
+        return lambda env: _check_size(op(left(env), right(env)))
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Operator '{type(node.op).__name__}' is not allowed.")
+        operand = _compile_node(node.operand, depth + 1, names)
+        return lambda env: op(operand(env))
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}.")
+
+@lru_cache(maxsize=config.CALCULATOR_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parses and validates an expression once; repeated expressions are served from the LRU cache."""
+    expression = expression.strip()
+    if not expression:
+        raise CalculatorError("Empty expression.")
+    if len(expression) > config.CALCULATOR_MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"Expression is longer than {config.CALCULATOR_MAX_EXPRESSION_LENGTH} characters.")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"Invalid expression: {e.msg}.") from e
+    names = set()
+    evaluator = _compile_node(tree, 0, names)
+    return CompiledExpression(expression, evaluator, frozenset(names))
+
+def evaluate(expression: str, variables: Optional[Dict[str, Sequence[float]]] = None):
+    """Evaluates one expression; with `variables` the result is a list computed element-wise."""
+    result = compile_expression(expression.strip()).evaluate(variables)
+    if isinstance(result, np.ndarray):
+        return result.tolist()
+    if isinstance(result, np.generic):
+        return result.item()
+    return result
+
+def evaluate_batch(expressions: List[str], variables: Optional[Dict[str, Sequence[float]]] = None) -> List[Dict[str, Any]]:
+    results = []
+    for expression in expressions:
+        try:
+            results.append({"expression": expression, "result": evaluate(expression, variables)})
+        except CalculatorError as e:
+            results.append({"expression": expression, "error": str(e)})
+    return results
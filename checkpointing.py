@@ -0,0 +1,336 @@
+# checkpointing.py
+"""
+Persistent LangGraph checkpointers so chat sessions survive restarts and can be resumed by any replica.
+
+SQLiteCheckpointSaver implements LangGraph's BaseCheckpointSaver interface (other backends, e.g. the
+Postgres saver, plug into create_agent_graph() the same way). Storage is kept compact: every message
+is serialized once into a content-addressed `payloads` table, and message lists (the `messages`
+channel and node writes) are stored as packed references to those rows, so a checkpoint after turn N
+only adds the new messages plus 32 bytes per reference. Each put/put_writes is a single transaction
+using executemany.
+"""
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+import config
+
+MESSAGE_REFS_TYPE = "message_refs"
+EMPTY_TYPE = "empty"
+_DIGEST_SIZE = 32
+_SELECT_BATCH = 500
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+    "parent_checkpoint_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL, metadata BLOB NOT NULL, "
+    "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS channel_values ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL, "
+    "type TEXT NOT NULL, value BLOB, PRIMARY KEY (thread_id, checkpoint_ns, channel, version))",
+    "CREATE TABLE IF NOT EXISTS writes ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, "
+    "idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT NOT NULL, value BLOB, task_path TEXT NOT NULL DEFAULT '', "
+    "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+    "CREATE TABLE IF NOT EXISTS payloads (digest BLOB PRIMARY KEY, type TEXT NOT NULL, value BLOB NOT NULL)",
+)
+
+def _split_digests(data: bytes) -> List[bytes]:
+    return [data[i:i + _DIGEST_SIZE] for i in range(0, len(data), _DIGEST_SIZE)]
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """Stores checkpoints for many threads in one SQLite file (WAL mode, safe across threads/processes)."""
+
+    def __init__(self, path: str, *, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    # --- value encoding -------------------------------------------------------------------------
+
+    def _encode(self, value: Any, payload_rows: Dict[bytes, Tuple[str, bytes]]) -> Tuple[str, bytes]:
+        """Serializes a channel/write value; message lists become packed digests into `payload_rows`."""
+        if isinstance(value, list) and value and all(isinstance(v, BaseMessage) for v in value):
+            digests = []
+            for message in value:
+                type_, data = self.serde.dumps_typed(message)
+                digest = hashlib.sha256(type_.encode("utf-8") + b"\0" + data).digest()
+                payload_rows.setdefault(digest, (type_, data))
+                digests.append(digest)
+            return MESSAGE_REFS_TYPE, b"".join(digests)
+        return self.serde.dumps_typed(value)
+
+    def _load_payloads(self, digests: List[bytes]) -> Dict[bytes, Any]:
+        loaded = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), _SELECT_BATCH):
+            batch = unique[start:start + _SELECT_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for digest, type_, data in self._conn.execute(
+                f"SELECT digest, type, value FROM payloads WHERE digest IN ({placeholders})", batch
+            ):
+                loaded[digest] = self.serde.loads_typed((type_, data))
+        return loaded
+
+    def _decode_all(self, encoded: List[Tuple[str, bytes]]) -> List[Any]:
+        """Decodes several values, resolving all message references with one payload lookup."""
+        digests = []
+        for type_, data in encoded:
+            if type_ == MESSAGE_REFS_TYPE:
+                digests.extend(_split_digests(data))
+        payloads = self._load_payloads(digests) if digests else {}
+        decoded = []
+        for type_, data in encoded:
+            if type_ == MESSAGE_REFS_TYPE:
+                decoded.append([payloads[digest] for digest in _split_digests(data)])
+            else:
+                decoded.append(self.serde.loads_typed((type_, data)))
+        return decoded
+
+    # --- reads ----------------------------------------------------------------------------------
+
+    def _build_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_blob, metadata_blob = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+
+        versions = checkpoint["channel_versions"]
+        channel_rows = []
+        for channel, version in versions.items():
+            found = self._conn.execute(
+                "SELECT type, value FROM channel_values WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if found is not None and found[0] != EMPTY_TYPE:
+                channel_rows.append((channel, found))
+
+        write_rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        send_rows = []
+        if parent_checkpoint_id:
+            send_rows = self._conn.execute(
+                "SELECT type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+                "AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+
+        decoded = self._decode_all(
+            [found for _, found in channel_rows] + [(w[2], w[3]) for w in write_rows] + list(send_rows)
+        )
+        channel_values = {channel: decoded[i] for i, (channel, _) in enumerate(channel_rows)}
+        offset = len(channel_rows)
+        pending_writes = [(w[0], w[1], decoded[offset + i]) for i, w in enumerate(write_rows)]
+        pending_sends = decoded[offset + len(write_rows):]
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values, "pending_sends": pending_sends},
+            metadata=self.serde.loads(metadata_blob),
+            pending_writes=pending_writes,
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        select = "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata FROM checkpoints "
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    select + "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    select + "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._build_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata FROM checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        returned = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and returned >= limit:
+                break
+            if filter:
+                metadata = self.serde.loads(row[4])
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            with self._lock:
+                checkpoint_tuple = self._build_tuple(thread_id, checkpoint_ns, tuple(row))
+            returned += 1
+            yield checkpoint_tuple
+
+    # --- writes ---------------------------------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        stored.pop("pending_sends", None)
+        values = stored.pop("channel_values")
+
+        payload_rows: Dict[bytes, Tuple[str, bytes]] = {}
+        value_rows = []
+        for channel, version in new_versions.items():
+            type_, data = self._encode(values[channel], payload_rows) if channel in values else (EMPTY_TYPE, None)
+            value_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, data))
+        type_, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_blob = self.serde.dumps(get_checkpoint_metadata(config, metadata))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO payloads (digest, type, value) VALUES (?, ?, ?)",
+                [(digest, t, d) for digest, (t, d) in payload_rows.items()],
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO channel_values VALUES (?, ?, ?, ?, ?, ?)", value_rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_blob, metadata_blob),
+            )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        payload_rows: Dict[bytes, Tuple[str, bytes]] = {}
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self._encode(value, payload_rows)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, data, task_path))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO payloads (digest, type, value) VALUES (?, ?, ?)",
+                [(digest, t, d) for digest, (t, d) in payload_rows.items()],
+            )
+            # Special writes (errors, interrupts; negative idx) overwrite, regular ones are kept if already recorded.
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] >= 0]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] < 0]
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Deletes a thread's checkpoints and writes, and the message payloads no other thread references.
+        Finding those scans the remaining message references, so it costs time proportional to the store.
+        """
+        with self._lock, self._conn:
+            candidates = set()
+            for table in ("channel_values", "writes"):
+                for (data,) in self._conn.execute(
+                    f"SELECT value FROM {table} WHERE thread_id = ? AND type = ?", (thread_id, MESSAGE_REFS_TYPE)
+                ):
+                    candidates.update(_split_digests(data))
+            for table in ("checkpoints", "channel_values", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            # Runs inside the write transaction, so no other writer can add a reference meanwhile.
+            for table in ("channel_values", "writes"):
+                if not candidates:
+                    break
+                for (data,) in self._conn.execute(f"SELECT value FROM {table} WHERE type = ?", (MESSAGE_REFS_TYPE,)):
+                    candidates.difference_update(_split_digests(data))
+            self._conn.executemany("DELETE FROM payloads WHERE digest = ?", [(digest,) for digest in candidates])
+
+    def get_next_version(self, current: Optional[str], channel) -> str:
+        # Zero-padded so versions sort lexically, as with LangGraph's own savers.
+        current_v = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_v + 1:032}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Returns the process-wide checkpointer selected by config.CHECKPOINT_BACKEND, or None when disabled."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            if config.CHECKPOINT_BACKEND == "sqlite":
+                _checkpointer = SQLiteCheckpointSaver(config.CHECKPOINT_SQLITE_PATH)
+            elif config.CHECKPOINT_BACKEND == "memory":
+                _checkpointer = InMemorySaver()
+        return _checkpointer
+
+def set_checkpointer(checkpointer: Optional[BaseCheckpointSaver]):
+    """Replaces the process-wide checkpointer (None re-reads config on next use)."""
+    global _checkpointer
+    with _checkpointer_lock:
+        _checkpointer = checkpointer
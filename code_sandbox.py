@@ -0,0 +1,226 @@
+# code_sandbox.py
+"""Out-of-process execution for python_code_executor.
+
+A small pool of pre-started worker processes runs the code so a runaway loop or allocation only
+takes down (and recycles) one worker instead of the agent process. Workers are reused across calls
+and limited by wall-clock timeout, CPU-time and address-space rlimits, and output size caps.
+"""
+import atexit
+import builtins
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Optional
+
+import config
+
+try:
+    import resource
+except ImportError:  # Windows: rlimits are unavailable, only the wall-clock timeout applies.
+    resource = None
+
+RESTRICTED_BUILTIN_NAMES = [
+    "len", "str", "int", "float", "list", "dict", "sum", "min", "max", "range", "abs", "round",
+]
+TRUNCATION_NOTE = "... [output truncated]"
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + TRUNCATION_NOTE
+
+def _current_address_space_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def _apply_memory_limit(memory_limit_mb: int):
+    if resource is None or memory_limit_mb <= 0:
+        return
+    # The limit is on top of the interpreter's own footprint so it bounds what user code can allocate.
+    limit = _current_address_space_bytes() + memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _apply_cpu_limit(cpu_seconds: float):
+    if resource is None or cpu_seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(used + cpu_seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _run_code(code: str, max_output_chars: int) -> dict:
+    stdout = io.StringIO()
+
+    def captured_print(*args, **kwargs):
+        kwargs.pop("file", None)
+        print(*args, file=stdout, **kwargs)
+
+    restricted_builtins = {name: getattr(builtins, name) for name in RESTRICTED_BUILTIN_NAMES}
+    restricted_builtins.update({"print": captured_print, "True": True, "False": False, "None": None})
+    local_scope = {}
+    started = time.perf_counter()
+    try:
+        exec(code, {"__builtins__": restricted_builtins}, local_scope)
+        captured_result = local_scope.get("result", "Code executed. No 'result' variable found or assigned by the code.")
+        try:
+            serialized = json.dumps(captured_result)
+            output = captured_result if len(serialized) <= max_output_chars else _truncate(serialized, max_output_chars)
+        except (TypeError, ValueError):
+            output = _truncate(str(captured_result), max_output_chars)
+        result = {"execution_status": "success", "output": output}
+    except MemoryError:
+        result = {"execution_status": "error", "output": "Memory limit exceeded."}
+    except Exception as e:
+        result = {"execution_status": "error", "output": _truncate(str(e), max_output_chars)}
+    result["execution_time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    printed = stdout.getvalue()
+    if printed:
+        result["stdout"] = _truncate(printed, max_output_chars)
+    return result
+
+def _worker_main(conn, memory_limit_mb: int):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        code, cpu_seconds, max_output_chars = job
+        _apply_cpu_limit(cpu_seconds)
+        conn.send(_run_code(code, max_output_chars))
+    conn.close()
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.executions = 0
+
+    def stop(self, force: bool = False):
+        if self.process.is_alive() and not force:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=1)
+            except (OSError, BrokenPipeError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+class SandboxPool:
+    """Pool of reusable worker processes; execute() blocks while every worker is busy."""
+
+    def __init__(
+        self,
+        size: int,
+        timeout_seconds: float,
+        cpu_seconds: float,
+        memory_limit_mb: int,
+        max_output_chars: int,
+        max_executions_per_worker: int,
+        start_method: str = "spawn",
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.max_output_chars = max_output_chars
+        self.max_executions_per_worker = max_executions_per_worker
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._new_worker())
+
+    def _new_worker(self) -> _Worker:
+        return _Worker(self._context, self.memory_limit_mb)
+
+    def execute(self, code: str, timeout_seconds: Optional[float] = None) -> dict:
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        started = time.perf_counter()
+        # Waiting for an idle worker and running the code share one deadline, so a call never takes
+        # longer than timeout_seconds (and stays within the tool executor's timeout).
+        deadline = started + timeout_seconds
+        try:
+            worker = self._idle.get(timeout=timeout_seconds)
+        except queue.Empty:
+            return {"execution_status": "error", "output": "All code execution workers are busy. Try again later.", "execution_time_ms": 0.0}
+
+        recycle = False
+        try:
+            worker.conn.send((code, self.cpu_seconds, self.max_output_chars))
+            worker.executions += 1
+            if worker.conn.poll(max(deadline - time.perf_counter(), 0)):
+                try:
+                    return worker.conn.recv()
+                except EOFError:
+                    recycle = True
+                    worker.process.join(timeout=1)
+                    if hasattr(signal, "SIGXCPU") and worker.process.exitcode == -signal.SIGXCPU:
+                        message = f"CPU time limit of {self.cpu_seconds}s exceeded."
+                    else:
+                        message = f"Code execution worker crashed (exit code {worker.process.exitcode}); it may have exceeded the memory limit."
+            else:
+                recycle = True
+                message = f"Execution timed out after {timeout_seconds}s."
+            return {
+                "execution_status": "error",
+                "output": message,
+                "execution_time_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        except (OSError, BrokenPipeError) as e:
+            recycle = True
+            return {"execution_status": "error", "output": f"Code execution worker failed: {e}", "execution_time_ms": 0.0}
+        finally:
+            if recycle or worker.executions >= self.max_executions_per_worker or not worker.process.is_alive():
+                worker.stop(force=recycle)
+                worker = None if self._closed else self._new_worker()
+            if worker is not None:
+                self._idle.put(worker)
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+_sandbox_pool: Optional[SandboxPool] = None
+_sandbox_pool_lock = threading.Lock()
+
+def get_sandbox_pool() -> SandboxPool:
+    global _sandbox_pool
+    with _sandbox_pool_lock:
+        if _sandbox_pool is None:
+            _sandbox_pool = SandboxPool(
+                size=config.CODE_EXECUTOR_WORKERS,
+                timeout_seconds=config.CODE_EXECUTOR_TIMEOUT_SECONDS,
+                cpu_seconds=config.CODE_EXECUTOR_CPU_SECONDS,
+                memory_limit_mb=config.CODE_EXECUTOR_MEMORY_LIMIT_MB,
+                max_output_chars=config.CODE_EXECUTOR_MAX_OUTPUT_CHARS,
+                max_executions_per_worker=config.CODE_EXECUTOR_MAX_EXECUTIONS_PER_WORKER,
+                start_method=config.CODE_EXECUTOR_START_METHOD,
+            )
+            atexit.register(_sandbox_pool.shutdown)
+        return _sandbox_pool
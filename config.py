@@ -7,4 +7,104 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 GROQ_MODEL_NAME = os.getenv("GROQ_MODEL_NAME", "llama3-8b-8192")
 LLM_TEMPERATURE = 0.1
-# AGENT_SYSTEM_PROMPT = "You are a helpful AI assistant..." # here is the example of a config option
\ No newline at end of file
+# AGENT_SYSTEM_PROMPT = "You are a helpful AI assistant..." # here is the example of a config option
+
+# Headless batch runner (main.py)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+# Tool result cache (tool_cache.py)
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TOOL_CACHE_BACKEND = os.getenv("TOOL_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+TOOL_CACHE_SQLITE_PATH = os.getenv("TOOL_CACHE_SQLITE_PATH", ".tool_cache.sqlite3")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+TOOL_CACHE_DEFAULT_TTL_SECONDS = 600
+TOOL_CACHE_TTL_SECONDS = {
+    "web_search": 900,
+    "document_summarizer": 86400,
+}
+
+# Chunked (map-reduce) summarization for document_summarizer (summarization.py); sizes are estimated tokens
+SUMMARIZER_SINGLE_PASS_MAX_TOKENS = int(os.getenv("SUMMARIZER_SINGLE_PASS_MAX_TOKENS", "5000"))
+SUMMARIZER_CHUNK_TOKENS = int(os.getenv("SUMMARIZER_CHUNK_TOKENS", "2500"))
+SUMMARIZER_CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARIZER_CHUNK_OVERLAP_TOKENS", "150"))
+SUMMARIZER_MAX_CONCURRENCY = int(os.getenv("SUMMARIZER_MAX_CONCURRENCY", "4"))
+
+# Shared HTTP connection pool for all Groq chat clients (llm_registry.py)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+
+# Token-budgeted conversation memory (conversation_memory.py); token counts are estimates
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "5000"))
+MEMORY_KEEP_LAST_TURNS = int(os.getenv("MEMORY_KEEP_LAST_TURNS", "3"))
+MEMORY_TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("MEMORY_TOOL_OUTPUT_MAX_TOKENS", "200"))
+MEMORY_SUMMARIZE = os.getenv("MEMORY_SUMMARIZE", "true").lower() in ("1", "true", "yes")
+
+# Sandboxed worker pool for python_code_executor (code_sandbox.py)
+CODE_EXECUTOR_WORKERS = int(os.getenv("CODE_EXECUTOR_WORKERS", "2"))
+CODE_EXECUTOR_TIMEOUT_SECONDS = float(os.getenv("CODE_EXECUTOR_TIMEOUT_SECONDS", "10"))
+CODE_EXECUTOR_CPU_SECONDS = float(os.getenv("CODE_EXECUTOR_CPU_SECONDS", "5"))
+CODE_EXECUTOR_MEMORY_LIMIT_MB = int(os.getenv("CODE_EXECUTOR_MEMORY_LIMIT_MB", "256"))
+CODE_EXECUTOR_MAX_OUTPUT_CHARS = int(os.getenv("CODE_EXECUTOR_MAX_OUTPUT_CHARS", "10000"))
+CODE_EXECUTOR_MAX_EXECUTIONS_PER_WORKER = int(os.getenv("CODE_EXECUTOR_MAX_EXECUTIONS_PER_WORKER", "100"))
+CODE_EXECUTOR_START_METHOD = os.getenv("CODE_EXECUTOR_START_METHOD", "spawn")
+
+# Calculator expression engine (calculator_engine.py)
+CALCULATOR_CACHE_SIZE = 1024
+CALCULATOR_MAX_EXPRESSION_LENGTH = 1000
+CALCULATOR_MAX_DEPTH = 100
+CALCULATOR_MAX_EXPONENT = 10000
+CALCULATOR_MAX_INTEGER_BITS = 4096
+
+# Parallel tool execution within one agent step (tool_executor.py)
+TOOL_EXECUTOR_MAX_WORKERS = int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "16"))
+TOOL_CONCURRENCY_LIMITS = {  # tools not listed are only bounded by the pool size
+    "web_search": 3,
+    "document_summarizer": 2,
+    "python_code_executor": CODE_EXECUTOR_WORKERS,
+}
+TOOL_DEFAULT_TIMEOUT_SECONDS = 60
+TOOL_TIMEOUT_SECONDS = {
+    "web_search": 20,
+    "calculator": 5,
+    "batch_calculator": 10,
+    "python_code_executor": CODE_EXECUTOR_TIMEOUT_SECONDS + 5,
+    "document_summarizer": 180,
+}
+
+# web_search pipeline (search_pipeline.py, page_fetcher.py); token counts are estimates
+WEB_SEARCH_DEFAULT_MAX_RESULTS = int(os.getenv("WEB_SEARCH_DEFAULT_MAX_RESULTS", "5"))
+WEB_SEARCH_MAX_RESULTS_LIMIT = int(os.getenv("WEB_SEARCH_MAX_RESULTS_LIMIT", "10"))
+WEB_SEARCH_FETCH_PAGES = os.getenv("WEB_SEARCH_FETCH_PAGES", "false").lower() in ("1", "true", "yes")  # default when the model doesn't ask
+WEB_SEARCH_FETCH_TOP_N = int(os.getenv("WEB_SEARCH_FETCH_TOP_N", "3"))
+WEB_SEARCH_FETCH_MAX_CONNECTIONS = int(os.getenv("WEB_SEARCH_FETCH_MAX_CONNECTIONS", "10"))
+WEB_SEARCH_FETCH_TIMEOUT_SECONDS = float(os.getenv("WEB_SEARCH_FETCH_TIMEOUT_SECONDS", "8"))
+WEB_SEARCH_FETCH_MAX_BYTES = int(os.getenv("WEB_SEARCH_FETCH_MAX_BYTES", "2000000"))
+WEB_SEARCH_USER_AGENT = os.getenv("WEB_SEARCH_USER_AGENT", "Mozilla/5.0 (compatible; multi-tool-agent/1.0)")
+WEB_SEARCH_TOKEN_BUDGET = int(os.getenv("WEB_SEARCH_TOKEN_BUDGET", "3000"))
+WEB_SEARCH_SESSION_LIMIT = 256  # conversations whose returned URLs/contents are remembered for dedup
+WEB_SEARCH_SESSION_MAX_ENTRIES = 500
+
+# Tracing / metrics (instrumentation.py)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACING_SINKS = [s.strip() for s in os.getenv("TRACING_SINKS", "jsonl").split(",") if s.strip()]  # memory, jsonl, prometheus
+TRACING_JSONL_PATH = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+TRACING_PROMETHEUS_PORT = int(os.getenv("TRACING_PROMETHEUS_PORT", "9464"))  # 0 disables the /metrics endpoint
+
+# Token streaming of agent answers
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Persistent conversation state (checkpointing.py)
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")  # "sqlite", "memory" or "none"
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", ".agent_checkpoints.sqlite3")
+
+# Whole-turn response cache for first messages (response_cache.py)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.85"))
+RESPONSE_CACHE_VECTOR_DIM = 1024
+RESPONSE_CACHE_TOOL_MAX_TTL_SECONDS = {  # turns that used these tools expire sooner; 0 disables caching them
+    "web_search": TOOL_CACHE_TTL_SECONDS["web_search"],
+}
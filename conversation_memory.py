@@ -0,0 +1,177 @@
+# conversation_memory.py
+import json
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+import config
+from summarization import CHARS_PER_TOKEN, estimate_tokens
+
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation (older turns were condensed to save context):\n"
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens(json.dumps([tc["args"] for tc in message.tool_calls]))
+    return tokens
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+def split_turns(messages: Sequence[BaseMessage]):
+    """Splits history into leading system messages and turns, each starting at a HumanMessage."""
+    system_messages: List[BaseMessage] = []
+    turns: List[List[BaseMessage]] = []
+    for msg in messages:
+        if isinstance(msg, SystemMessage) and not turns:
+            system_messages.append(msg)
+        elif isinstance(msg, HumanMessage) or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return system_messages, turns
+
+@dataclass
+class MemoryMetrics:
+    """Metrics for one user turn, summed over the LLM calls (agent steps) it took."""
+    llm_calls: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    tool_outputs_compacted: int = 0
+    turns_summarized: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+class ConversationMemory:
+    """
+    Keeps the prompt sent to the LLM within a token budget.
+    The system prompt and the last `keep_last_turns` turns are sent verbatim. Tool outputs in older turns
+    are truncated, and if the history is still over budget the oldest turns are folded into a running
+    summary. The summary is updated incrementally: only turns not folded before are sent to the LLM.
+    `last_metrics` covers the latest user turn across all of its LLM calls.
+    One instance should be used per conversation.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        keep_last_turns: Optional[int] = None,
+        tool_output_max_tokens: Optional[int] = None,
+        summarize: Optional[bool] = None,
+    ):
+        self.token_budget = config.MEMORY_TOKEN_BUDGET if token_budget is None else token_budget
+        self.keep_last_turns = config.MEMORY_KEEP_LAST_TURNS if keep_last_turns is None else keep_last_turns
+        self.tool_output_max_tokens = config.MEMORY_TOOL_OUTPUT_MAX_TOKENS if tool_output_max_tokens is None else tool_output_max_tokens
+        self.summarize = config.MEMORY_SUMMARIZE if summarize is None else summarize
+        self.summary = ""
+        self.folded_turns = 0
+        self._first_turn_fingerprint = None
+        self._metrics_turn = None
+        self.last_metrics = MemoryMetrics()
+        self.total_tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def _compact_tool_output(self, message: BaseMessage) -> Optional[BaseMessage]:
+        if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+            return None
+        max_chars = self.tool_output_max_tokens * CHARS_PER_TOKEN
+        if len(message.content) <= max_chars:
+            return None
+        dropped = len(message.content) - max_chars
+        return message.model_copy(update={"content": f"{message.content[:max_chars]}\n[... {dropped} characters of stale tool output truncated]"})
+
+    def _update_summary(self, turns: List[List[BaseMessage]]):
+        if not self.summarize:
+            return
+        transcript = "\n".join(
+            f"{type(msg).__name__.replace('Message', '')}: {msg.content}" for turn in turns for msg in turn if msg.content
+        )
+        from llm_registry import get_llm
+        instruction = (
+            "Update the running summary of a conversation between a user and an AI assistant with the new turns below. "
+            "Keep facts, results of tool calls, user preferences and open questions; be concise. Reply with the updated summary only."
+        )
+        # "nostream" keeps this internal call out of the token stream shown to the user.
+        response = get_llm().invoke([
+            HumanMessage(content=instruction),
+            HumanMessage(content=f"CURRENT_SUMMARY:\n{self.summary or '(empty)'}\n\nNEW_TURNS:\n{transcript}"),
+        ], {"tags": ["nostream"]})
+        self.summary = response.content
+
+    def prepare(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """Returns the messages to send to the LLM for this step and adds this step to the turn's MemoryMetrics."""
+        with self._lock:
+            system_messages, turns = split_turns(messages)
+            metrics = MemoryMetrics(llm_calls=1, tokens_before=count_tokens(messages))
+
+            fingerprint = turns[0][0].content if turns else None
+            if fingerprint != self._first_turn_fingerprint or len(turns) < self.folded_turns:
+                # A different conversation was passed in; start over.
+                self.summary, self.folded_turns = "", 0
+                self._first_turn_fingerprint = fingerprint
+
+            recent_start = max(len(turns) - max(self.keep_last_turns, 1), 0)
+            older_turns = []
+            for turn in turns[self.folded_turns:recent_start]:
+                compacted_turn = []
+                for msg in turn:
+                    compacted = self._compact_tool_output(msg)
+                    if compacted is not None:
+                        metrics.tool_outputs_compacted += 1
+                    compacted_turn.append(compacted or msg)
+                older_turns.append(compacted_turn)
+            recent_turns = turns[recent_start:]
+
+            def assemble():
+                prepared = list(system_messages)
+                if self.summary:
+                    prepared.append(SystemMessage(content=SUMMARY_PREFIX + self.summary))
+                for turn in older_turns + recent_turns:
+                    prepared.extend(turn)
+                return prepared
+
+            prepared = assemble()
+            if older_turns and count_tokens(prepared) > self.token_budget:
+                to_fold = []
+                while older_turns and count_tokens(prepared) > self.token_budget:
+                    to_fold.append(older_turns.pop(0))
+                    prepared = assemble()
+                try:
+                    self._update_summary(to_fold)
+                except Exception:
+                    # Summarization is best effort; the folded turns are dropped either way.
+                    pass
+                self.folded_turns += len(to_fold)
+                metrics.turns_summarized = len(to_fold)
+                prepared = assemble()
+
+            metrics.tokens_after = count_tokens(prepared)
+            self._add_to_turn_metrics(metrics, (fingerprint, len(turns)))
+            self.total_tokens_saved += metrics.tokens_saved
+            return prepared
+
+    def _add_to_turn_metrics(self, step: MemoryMetrics, turn_key):
+        # Steps of one turn share the conversation and the number of turns; a new user message starts a new turn.
+        if turn_key != self._metrics_turn:
+            self._metrics_turn = turn_key
+            self.last_metrics = MemoryMetrics()
+        turn = self.last_metrics
+        turn.llm_calls += step.llm_calls
+        turn.tokens_before += step.tokens_before
+        turn.tokens_after += step.tokens_after
+        turn.turns_summarized += step.turns_summarized
+        # The same stale outputs are compacted again on every step, so they are counted once.
+        turn.tool_outputs_compacted = max(turn.tool_outputs_compacted, step.tool_outputs_compacted)
+
+def prepare_messages_for_llm(messages: Sequence[BaseMessage], runnable_config) -> Sequence[BaseMessage]:
+    """Applies the ConversationMemory passed as configurable 'conversation_memory', if any."""
+    memory = (runnable_config or {}).get("configurable", {}).get("conversation_memory")
+    if memory is None:
+        return messages
+    return memory.prepare(messages)
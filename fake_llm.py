@@ -0,0 +1,90 @@
+# fake_llm.py
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ScriptStep = Union[str, Dict[str, Any]]
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatGroq used by the batch runner and local testing.
+    `script` lists the responses for each agent step of a turn: a plain string is a final answer,
+    a dict may carry 'content' and 'tool_calls' (each {'name', 'args'}).
+    The step is derived from the number of AI messages since the last human message, so one model
+    can serve many concurrent conversations deterministically. Once the script is exhausted
+    (or when it is empty) the model replies with `default_response`, or echoes the last user message.
+    `latency_seconds` is slept on every call to mimic API latency.
+    """
+
+    script: List[ScriptStep] = []
+    default_response: Optional[str] = None
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        message = self._next_message(messages)
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                for i, tc in enumerate(message.tool_calls)
+            ]
+            yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, tool_call_chunks=tool_call_chunks))
+            return
+        for token in re.findall(r"\S+\s*", message.content):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        step = 0
+        last_human_content = ""
+        for msg in reversed(messages):
+            if isinstance(msg, HumanMessage):
+                last_human_content = msg.content
+                break
+            if isinstance(msg, AIMessage):
+                step += 1
+
+        if step >= len(self.script):
+            if self.default_response is not None:
+                return AIMessage(content=self.default_response)
+            return AIMessage(content=f"Echo: {last_human_content}")
+        scripted = self.script[step]
+        if isinstance(scripted, str):
+            return AIMessage(content=scripted)
+        tool_calls = [
+            {"name": tc["name"], "args": tc.get("args", {}), "id": tc.get("id", f"call_{step}_{i}")}
+            for i, tc in enumerate(scripted.get("tool_calls", []))
+        ]
+        return AIMessage(content=scripted.get("content", ""), tool_calls=tool_calls)
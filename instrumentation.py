@@ -0,0 +1,240 @@
+# instrumentation.py
+"""Tracing and metrics for agent turns, graph nodes, tools and LLM calls.
+
+Spans record start time, duration, input/output sizes, token usage, errors and free-form attributes
+(e.g. cache hits) and are exported to pluggable sinks: in-memory (tests), a JSONL file, and a
+Prometheus-style text endpoint. When tracing is disabled the wrappers call straight through.
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import config
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = 0.0
+    duration_ms: float = 0.0
+    input_size: Optional[int] = None
+    output_size: Optional[int] = None
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+def payload_size(value: Any) -> int:
+    """Approximate size in characters of a node/tool payload (message contents, strings, dicts)."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        if "messages" in value:
+            return payload_size(value["messages"])
+        return sum(payload_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return payload_size(content)
+    return len(str(value))
+
+def token_usage(message: Any) -> Dict[str, int]:
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return {k: usage[k] for k in ("input_tokens", "output_tokens", "total_tokens") if k in usage}
+    raw = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    mapping = {"prompt_tokens": "input_tokens", "completion_tokens": "output_tokens", "total_tokens": "total_tokens"}
+    return {mapping[k]: v for k, v in raw.items() if k in mapping}
+
+class InMemorySink:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+class JsonlFileSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(asdict(span), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+class PrometheusSink:
+    """Aggregates spans into counters exposed in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[tuple, float] = {}
+
+    def _inc(self, metric: str, labels: Dict[str, str], amount: float = 1.0):
+        key = (metric, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def export(self, span: Span):
+        labels = {"kind": span.kind, "name": span.name}
+        with self._lock:
+            self._inc("agent_span_total", labels)
+            self._inc("agent_span_duration_ms_sum", labels, span.duration_ms)
+            if span.error:
+                self._inc("agent_span_errors_total", labels)
+            for token_type in ("input_tokens", "output_tokens"):
+                if token_type in span.attributes:
+                    self._inc("agent_llm_tokens_total", {**labels, "type": token_type}, span.attributes[token_type])
+            if "cache_hit" in span.attributes:
+                self._inc("agent_tool_cache_lookups_total", {**labels, "result": "hit" if span.attributes["cache_hit"] else "miss"})
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._counters.items())
+        lines = []
+        for (metric, labels), value in items:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serves render() at /metrics from a daemon thread."""
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-endpoint").start()
+        return server
+
+class _SpanContext:
+    def __init__(self, tracer: "Tracer", name: str, kind: str, input_value: Any):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            input_size=payload_size(input_value) if input_value is not None else None,
+        )
+
+    def __enter__(self) -> Span:
+        self.span.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.export(self.span)
+        return False
+
+class Tracer:
+    def __init__(self, sinks: Optional[list] = None, enabled: bool = True):
+        self.sinks = list(sinks or [])
+        self.enabled = enabled and bool(self.sinks)
+
+    def span(self, name: str, kind: str, input_value: Any = None) -> _SpanContext:
+        return _SpanContext(self, name, kind, input_value)
+
+    def export(self, span: Span):
+        for sink in self.sinks:
+            try:
+                sink.export(span)
+            except Exception:
+                # A failing exporter must never break the agent.
+                pass
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def _build_tracer_from_config() -> Tracer:
+    if not config.TRACING_ENABLED:
+        return Tracer(enabled=False)
+    sinks = []
+    for sink_name in config.TRACING_SINKS:
+        if sink_name == "memory":
+            sinks.append(InMemorySink())
+        elif sink_name == "jsonl":
+            sinks.append(JsonlFileSink(config.TRACING_JSONL_PATH))
+        elif sink_name == "prometheus":
+            prometheus_sink = PrometheusSink()
+            if config.TRACING_PROMETHEUS_PORT:
+                prometheus_sink.serve(config.TRACING_PROMETHEUS_PORT)
+            sinks.append(prometheus_sink)
+    return Tracer(sinks)
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _build_tracer_from_config()
+    return _tracer
+
+def set_tracer(tracer: Optional[Tracer]):
+    """Installs a tracer (e.g. Tracer([InMemorySink()]) in tests); None rebuilds it from config on next use."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+def annotate_current_span(**attributes):
+    """Adds attributes (e.g. cache_hit=True) to the innermost active span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+def traced_node(name: str):
+    """Wraps a graph node function (state, config) in a 'node' span with message sizes and token usage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            state = next((a for a in args if isinstance(a, dict)), kwargs.get("state"))
+            with tracer.span(name, "node", state) as span:
+                result = func(*args, **kwargs)
+                span.output_size = payload_size(result)
+                for message in (result or {}).get("messages", []):
+                    for key, value in token_usage(message).items():
+                        span.attributes[key] = span.attributes.get(key, 0) + value
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,65 @@
+# llm_registry.py
+import threading
+from typing import Dict, Optional, Tuple
+
+import config
+
+_clients: Dict[Tuple[str, float], object] = {}
+_override_llm = None
+_http_client = None
+_lock = threading.Lock()
+
+def _get_http_client():
+    """One pooled HTTP client shared by every Groq chat client (agent and summarizer)."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=config.LLM_HTTP_TIMEOUT_SECONDS,
+        )
+    return _http_client
+
+def get_llm(model_name: Optional[str] = None, temperature: Optional[float] = None):
+    """
+    Returns the shared chat model for (model_name, temperature), creating it on first use.
+    If a model was injected with set_llm_override(), that model is returned for every key.
+    Raises ValueError if a Groq client is needed and GROQ_API_KEY is not configured.
+    """
+    model_name = model_name or config.GROQ_MODEL_NAME
+    temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+    with _lock:
+        if _override_llm is not None:
+            return _override_llm
+        key = (model_name, temperature)
+        llm = _clients.get(key)
+        if llm is None:
+            if not config.GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY not found in environment or config.py. Please set it.")
+            from langchain_groq import ChatGroq
+            llm = ChatGroq(
+                groq_api_key=config.GROQ_API_KEY,
+                model_name=model_name,
+                temperature=temperature,
+                http_client=_get_http_client(),
+            )
+            _clients[key] = llm
+        return llm
+
+def set_llm_override(llm):
+    """Routes every get_llm() call to `llm` (e.g. a fake chat model for offline runs); None restores Groq."""
+    global _override_llm
+    with _lock:
+        _override_llm = llm
+
+def reset_llm_clients():
+    """Drops cached clients and closes the shared HTTP pool (e.g. after the API key or model changes)."""
+    global _http_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
@@ -1 +1,143 @@
-"Just a additional File used during the CLI testing"
+# main.py
+"""Headless batch runner: drives the agent graph over a JSONL file of prompts.
+
+Usage:
+    python main.py prompts.jsonl --workers 8 --output results.jsonl
+    cat prompts.jsonl | python main.py - --fake-llm
+
+Each input line is either a JSON object with a 'prompt' field (and an optional 'id')
+or a bare JSON string. One JSON result line is written per prompt as soon as it completes.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import config
+from response_cache import get_response_cache
+
+def parse_request_line(line: str, index: int) -> dict:
+    data = json.loads(line)
+    if isinstance(data, str):
+        return {"id": index, "prompt": data}
+    if not isinstance(data, dict) or not isinstance(data.get("prompt"), str):
+        raise ValueError("each line must be a JSON string or an object with a 'prompt' string")
+    return {"id": data.get("id", index), "prompt": data["prompt"]}
+
+def run_request(graph, request: dict, recursion_limit: int) -> dict:
+    from agent_graph import agent_system_message_content
+    from turn_runner import run_turn
+
+    record = {"id": request["id"], "prompt": request["prompt"]}
+    initial_state = {"messages": [SystemMessage(content=agent_system_message_content), HumanMessage(content=request["prompt"])]}
+    # Each prompt is an independent conversation; a checkpointed graph needs its own fresh thread.
+    configurable = {"thread_id": f"batch-{uuid.uuid4().hex}"} if getattr(graph, "checkpointer", None) is not None else None
+    started = time.perf_counter()
+    try:
+        turn_result = run_turn(graph, initial_state, recursion_limit=recursion_limit, configurable=configurable,
+                               response_cache=get_response_cache())
+        record.update({
+            "status": "success",
+            "answer": turn_result.final_answer,
+            "llm_calls": turn_result.llm_calls,
+            "tool_calls": turn_result.tool_invocations,
+            "time_to_first_token_s": round(turn_result.time_to_first_token, 4) if turn_result.time_to_first_token is not None else None,
+            "cache_hit": turn_result.cache_hit,
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": str(e)})
+    record["latency_s"] = round(time.perf_counter() - started, 4)
+    return record
+
+def run_batch(graph, input_stream, output_stream, workers: int, recursion_limit: int) -> dict:
+    """Runs every request with at most `workers` graph executions in flight and streams results."""
+    write_lock = threading.Lock()
+    summary = {"total": 0, "success": 0, "error": 0}
+
+    def write_record(record: dict):
+        with write_lock:
+            output_stream.write(json.dumps(record) + "\n")
+            output_stream.flush()
+            summary["total"] += 1
+            summary[record["status"]] += 1
+
+    def drain(pending, return_when):
+        done, still_pending = wait(pending, return_when=return_when)
+        for future in done:
+            write_record(future.result())
+        return still_pending
+
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for index, line in enumerate(input_stream):
+            if not line.strip():
+                continue
+            try:
+                request = parse_request_line(line, index)
+            except ValueError as e:
+                write_record({"id": index, "status": "error", "error": f"Invalid request line: {e}"})
+                continue
+            # Keep a bounded window of submitted work so large inputs are not read into memory up front.
+            if len(pending) >= workers * 2:
+                pending = drain(pending, FIRST_COMPLETED)
+            pending.add(executor.submit(run_request, graph, request, recursion_limit))
+        if pending:
+            drain(pending, ALL_COMPLETED)
+    return summary
+
+def build_graph(use_fake_llm: bool, fake_script_path=None):
+    from agent_graph import create_agent_graph
+    if use_fake_llm or fake_script_path:
+        from fake_llm import ScriptedChatModel
+        from llm_registry import set_llm_override
+        script = []
+        if fake_script_path:
+            with open(fake_script_path, encoding="utf-8") as f:
+                script = json.load(f)
+        # Tools that call an LLM themselves (document_summarizer) get a plain echoing fake.
+        set_llm_override(ScriptedChatModel())
+        return create_agent_graph(llm=ScriptedChatModel(script=script))
+    # Batch prompts are one-off conversations, so there is nothing worth persisting.
+    return create_agent_graph(checkpointer=None)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run JSONL prompts through the multi-tool agent.")
+    parser.add_argument("input", help="Path to a JSONL file of prompts, or '-' for stdin.")
+    parser.add_argument("-o", "--output", default="-", help="Path for JSONL results, or '-' for stdout (default).")
+    parser.add_argument("-w", "--workers", type=int, default=config.BATCH_WORKERS, help="Number of concurrent graph executions.")
+    parser.add_argument("--recursion-limit", type=int, default=15, help="LangGraph recursion limit per prompt.")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the offline scripted chat model instead of Groq.")
+    parser.add_argument("--fake-script", help="JSON file with the per-step responses for the scripted chat model (implies --fake-llm).")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    graph = build_graph(args.fake_llm, args.fake_script)
+    input_stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        summary = run_batch(graph, input_stream, output_stream, args.workers, args.recursion_limit)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Processed {summary['total']} prompts ({summary['success']} ok, {summary['error']} failed) "
+        f"in {elapsed:.2f}s with {args.workers} workers.",
+        file=sys.stderr,
+    )
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        print(f"Response cache: {json.dumps(response_cache.snapshot())}", file=sys.stderr)
+    return 0 if summary["error"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# page_fetcher.py
+"""
+Concurrent page retrieval for web_search.
+
+A single pooled httpx.AsyncClient runs on a background event loop, so synchronous tool code can fetch
+several result pages at once without opening a new connection per page or blocking the tool pool.
+Responses are size-capped and converted from HTML to plain text with lxml.
+"""
+import asyncio
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+import httpx
+from lxml import etree
+from lxml import html as lxml_html
+
+import config
+
+_DROPPED_TAGS = ("head", "script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form")
+_BLOCK_TAGS = ("p", "div", "br", "li", "tr", "section", "article", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6")
+_TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+def html_to_text(markup) -> str:
+    """Extracts readable text from an HTML document (str or bytes), dropping scripts, styles and page chrome."""
+    if not markup or not markup.strip():
+        return ""
+    try:
+        root = lxml_html.fromstring(markup)
+    except (etree.ParserError, ValueError):
+        return ""
+    for element in root.xpath(" | ".join(f"//{tag}" for tag in _DROPPED_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+    for element in root.iter(*_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+    lines = (" ".join(line.split()) for line in root.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+class PageFetcher:
+    """Fetches pages concurrently over one connection pool; failed or non-text pages are left out."""
+
+    def __init__(self, max_connections: int, timeout_seconds: float, max_bytes: int):
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+        self.max_bytes = max_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="page-fetcher")
+        self._thread.start()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily on the loop thread, which owns the client.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout_seconds),
+                follow_redirects=True,
+                headers={"User-Agent": config.WEB_SEARCH_USER_AGENT},
+            )
+        return self._client
+
+    async def _fetch_one(self, url: str) -> Optional[str]:
+        async with self._get_client().stream("GET", url) as response:
+            if response.status_code >= 400:
+                return None
+            content_type = response.headers.get("content-type", "text/html").split(";")[0].strip().lower()
+            if content_type not in _TEXT_CONTENT_TYPES:
+                return None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= self.max_bytes:
+                    break
+        if content_type == "text/plain":
+            return bytes(body[:self.max_bytes]).decode(response.charset_encoding or "utf-8", errors="replace")
+        # Parsing is CPU-bound, so keep it off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(None, html_to_text, bytes(body[:self.max_bytes]))
+
+    async def _fetch_all(self, urls: List[str]) -> Dict[str, str]:
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._fetch_one(url), self.timeout_seconds) for url in urls), return_exceptions=True
+        )
+        return {url: text for url, text in zip(urls, results) if isinstance(text, str) and text}
+
+    def fetch(self, urls: List[str]) -> Dict[str, str]:
+        """Returns {url: page text} for the pages that could be retrieved within the timeout."""
+        if not urls:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(list(dict.fromkeys(urls))), self._loop)
+        return future.result(timeout=self.timeout_seconds + 1)
+
+    def close(self):
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+_page_fetcher: Optional[PageFetcher] = None
+_page_fetcher_lock = threading.Lock()
+
+def get_page_fetcher() -> PageFetcher:
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = PageFetcher(
+                config.WEB_SEARCH_FETCH_MAX_CONNECTIONS,
+                config.WEB_SEARCH_FETCH_TIMEOUT_SECONDS,
+                config.WEB_SEARCH_FETCH_MAX_BYTES,
+            )
+            atexit.register(_page_fetcher.close)
+        return _page_fetcher
@@ -0,0 +1,217 @@
+# response_cache.py
+"""
+Whole-turn response cache for first messages of a conversation.
+
+Prompts are normalized and looked up exactly first; otherwise they are embedded as signed hashed
+character n-gram vectors and matched against a NumPy matrix of cached prompts by cosine similarity.
+Whole words are hashed alongside the n-grams, so a swapped entity ("Iran" / "Iraq") falls below the
+threshold even though most character n-grams are shared. A similar prompt also only counts if it has
+exactly the same numbers, operators, negations and tense/modal verbs, so "25*76" never answers "25*77"
+and "who was" never answers "who is".
+Entries expire after a TTL (shortened by the tools a turn used) and are evicted least recently used.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+_SIGNATURE_RE = re.compile(r"\d+(?:\.\d+)?|[-+*/^%=<>]")
+# Words that change what is being asked while barely moving the n-gram vector.
+_GUARD_WORDS = frozenset(
+    "not no never without is are was were be been will would shall should can could may might must "
+    "do does did has have had".split()
+)
+_WORD_WEIGHT = 4.0
+_TOKEN_RE = re.compile(r"\w+")
+_CONTRACTIONS = ((r"n't\b", " not"), (r"'s\b", " is"), (r"'re\b", " are"), (r"'ll\b", " will"), (r"'d\b", " would"))
+# Filler words dropped before embedding so phrasing differences ("what's the" / "please tell me")
+# don't dominate the similarity of short prompts. Negations and conjunctions are deliberately kept.
+_FILLER_WORDS = frozenset(
+    "a an the what please tell me you i of to for in on about give show find calculate compute".split()
+)
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-folds, collapses whitespace, drops spaces around punctuation/operators and trailing '?!.'."""
+    text = " ".join((prompt or "").casefold().split())
+    text = re.sub(r"\s*([^\w\s])\s*", r"\1", text)
+    return text.rstrip("?!. ")
+
+def prompt_signature(normalized: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """The numbers/operators and the negation/tense words of a prompt, which must match exactly for a similarity hit."""
+    return tuple(_SIGNATURE_RE.findall(normalized)), tuple(sorted(w for w in content_words(normalized) if w in _GUARD_WORDS))
+
+def content_words(normalized: str) -> List[str]:
+    """The prompt's words with contractions expanded and filler words removed, in order."""
+    for pattern, replacement in _CONTRACTIONS:
+        normalized = re.sub(pattern, replacement, normalized)
+    return [t for t in _TOKEN_RE.findall(normalized) if t not in _FILLER_WORDS]
+
+def embed_prompt(normalized: str, dim: int, ngram_sizes=(3, 4, 5)) -> np.ndarray:
+    """L2-normalized signed feature hashing of the character n-grams and words of the prompt's content words."""
+    vector = np.zeros(dim, dtype=np.float32)
+    words = content_words(normalized)
+    padded = f" {' '.join(words)} "
+    features = [(padded[i:i + n], 1.0) for n in ngram_sizes for i in range(len(padded) - n + 1)]
+    features += [("word:" + word, _WORD_WEIGHT) for word in words]
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if (h >> 31) & 1 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+@dataclass
+class ResponseCacheStats:
+    lookups: int = 0
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    skipped_stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+@dataclass
+class _Entry:
+    slot: int
+    answer: str
+    signature: Tuple[Tuple[str, ...], Tuple[str, ...]]
+    expires_at: float
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        similarity_threshold: float,
+        vector_dim: int = 1024,
+        tool_max_ttl_seconds: Optional[Dict[str, float]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.vector_dim = vector_dim
+        self.tool_max_ttl_seconds = tool_max_ttl_seconds or {}
+        self.stats = ResponseCacheStats()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._vectors = np.zeros((max_entries, vector_dim), dtype=np.float32)
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._active[entry.slot] = False
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def lookup(self, prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (answer, "exact" | "semantic") for a cached match, or (None, None)."""
+        key = normalize_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            self.stats.lookups += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.exact_hits += 1
+                    return entry.answer, "exact"
+                self._remove(key)
+                self.stats.expirations += 1
+
+            if self._active.any():
+                similarities = self._vectors @ embed_prompt(key, self.vector_dim)
+                similarities[~self._active] = -1.0
+                signature = prompt_signature(key)
+                # Best candidates first; stop at the first live one with a matching signature.
+                for slot in np.argsort(similarities)[::-1]:
+                    if similarities[slot] < self.similarity_threshold:
+                        break
+                    candidate_key = self._slot_keys[slot]
+                    candidate = self._entries[candidate_key]
+                    if candidate.expires_at <= now:
+                        self._remove(candidate_key)
+                        self.stats.expirations += 1
+                        continue
+                    if candidate.signature == signature:
+                        self._entries.move_to_end(candidate_key)
+                        self.stats.semantic_hits += 1
+                        return candidate.answer, "semantic"
+            self.stats.misses += 1
+            return None, None
+
+    def ttl_for_tool_calls(self, tool_calls: List[dict]) -> float:
+        """TTL for a turn given its tool calls; 0 means the turn must not be cached."""
+        ttl = self.ttl_seconds
+        for tool_call in tool_calls:
+            # A search the model marked as time-sensitive makes the whole answer time-sensitive.
+            if tool_call.get("name") == "web_search" and (tool_call.get("args") or {}).get("fresh"):
+                return 0.0
+            ttl = min(ttl, self.tool_max_ttl_seconds.get(tool_call.get("name"), ttl))
+        return ttl
+
+    def store(self, prompt: str, answer: str, tool_calls: Optional[List[dict]] = None, tool_failed: bool = False) -> bool:
+        """Caches a turn's answer; turns where a tool failed are skipped, like errors in tool_cache.py."""
+        ttl = self.ttl_for_tool_calls(tool_calls or [])
+        with self._lock:
+            if not answer or ttl <= 0 or tool_failed or self.max_entries <= 0:
+                self.stats.skipped_stores += 1
+                return False
+            key = normalize_prompt(prompt)
+            if key in self._entries:
+                self._remove(key)
+            while not self._free_slots:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+            slot = self._free_slots.pop()
+            self._vectors[slot] = embed_prompt(key, self.vector_dim)
+            self._active[slot] = True
+            self._slot_keys[slot] = key
+            self._entries[key] = _Entry(slot, answer, prompt_signature(key), time.time() + ttl)
+            self.stats.stores += 1
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**asdict(self.stats), "hit_rate": round(self.stats.hit_rate, 4), "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Returns the process-wide cache, or None when RESPONSE_CACHE_ENABLED is off."""
+    global _response_cache
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                config.RESPONSE_CACHE_MAX_ENTRIES,
+                config.RESPONSE_CACHE_TTL_SECONDS,
+                config.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+                config.RESPONSE_CACHE_VECTOR_DIM,
+                config.RESPONSE_CACHE_TOOL_MAX_TTL_SECONDS,
+            )
+        return _response_cache
+
+def set_response_cache(cache: Optional[ResponseCache]):
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = cache
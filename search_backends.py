@@ -0,0 +1,76 @@
+# search_backends.py
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+class DuckDuckGoBackend:
+    """Live web search through the duckduckgo-search library; result pages are fetched over HTTP."""
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        from duckduckgo_search import DDGS
+        with DDGS() as ddgs:
+            return [
+                {"title": r.get("title"), "href": r.get("href"), "body": r.get("body")}
+                for r in ddgs.text(query, max_results=max_results)
+            ]
+
+    def fetch_pages(self, urls: List[str]) -> Dict[str, str]:
+        from page_fetcher import get_page_fetcher
+        return get_page_fetcher().fetch(urls)
+
+class StaticCorpusBackend:
+    """
+    Offline stand-in that ranks a fixed list of documents ({'title', 'href', 'body'}) by word overlap
+    with the query, optionally sleeping `latency_seconds` per call to mimic network time.
+    A document's page is its 'html' (converted to text) or 'content' field, falling back to 'body'.
+    """
+
+    def __init__(self, documents: List[Dict[str, str]], latency_seconds: float = 0.0):
+        self.documents = documents
+        self.latency_seconds = latency_seconds
+
+    @staticmethod
+    def _words(text: str) -> set:
+        return set(re.findall(r"\w+", (text or "").lower()))
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        query_words = self._words(query)
+        scored = []
+        for doc in self.documents:
+            score = len(query_words & self._words(f"{doc.get('title')} {doc.get('body')}"))
+            if score:
+                scored.append((score, doc))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{"title": d.get("title"), "href": d.get("href"), "body": d.get("body")} for _, d in scored[:max_results]]
+
+    def fetch_pages(self, urls: List[str]) -> Dict[str, str]:
+        from page_fetcher import html_to_text
+        if self.latency_seconds:
+            # Pages are fetched concurrently, so a batch costs one round-trip.
+            time.sleep(self.latency_seconds)
+        by_href = {doc.get("href"): doc for doc in self.documents}
+        pages = {}
+        for url in urls:
+            doc = by_href.get(url)
+            if doc is not None:
+                pages[url] = html_to_text(doc["html"]) if doc.get("html") else (doc.get("content") or doc.get("body") or "")
+        return pages
+
+_search_backend = None
+_search_backend_lock = threading.Lock()
+
+def get_search_backend():
+    global _search_backend
+    with _search_backend_lock:
+        if _search_backend is None:
+            _search_backend = DuckDuckGoBackend()
+        return _search_backend
+
+def set_search_backend(backend: Optional[object]):
+    """Replaces the backend used by web_search (None restores DuckDuckGo)."""
+    global _search_backend
+    with _search_backend_lock:
+        _search_backend = backend
@@ -0,0 +1,178 @@
+# search_pipeline.py
+"""
+The web_search pipeline: search, optionally fetch the top result pages, drop results already returned
+earlier in the same conversation, and trim everything to a token budget.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import config
+from search_backends import get_search_backend
+from summarization import CHARS_PER_TOKEN
+from tool_cache import cached_tool
+
+_TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid")
+
+def normalize_url(url: str) -> str:
+    """Canonical form for dedup: lower-cased scheme/host, no fragment, trailing slash or tracking parameters."""
+    parts = urlsplit((url or "").strip())
+    query = "&".join(
+        p for p in parts.query.split("&") if p and not p.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+def content_fingerprint(text: str) -> str:
+    return hashlib.sha1(" ".join((text or "").split()).casefold().encode("utf-8")).hexdigest()[:16]
+
+class SearchSessions:
+    """
+    Remembers which URLs (with their content) and contents web_search returned per conversation, and in
+    which turn, LRU-bounded. With `keep_turns`, only results from the last `keep_turns` turns count as
+    already returned: ConversationMemory truncates or summarizes tool outputs of older turns, so those
+    are returned in full again.
+    """
+
+    def __init__(self, max_sessions: int, max_entries_per_session: int, keep_turns: Optional[int] = None):
+        self.max_sessions = max_sessions
+        self.max_entries_per_session = max_entries_per_session
+        self.keep_turns = keep_turns
+        self._sessions: "OrderedDict[str, OrderedDict[str, Tuple[Optional[str], Optional[int]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _still_verbatim(self, returned_in: Optional[int], turn: Optional[int]) -> bool:
+        if self.keep_turns is None or turn is None or returned_in is None:
+            return True
+        return turn - returned_in < max(self.keep_turns, 1)
+
+    def split_seen(
+        self, session_id: Optional[str], results: List[Dict], remember_only: bool = False, turn: Optional[int] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Splits results into (new, seen). Duplicates within `results` always count as seen; with a
+        session id, so do contents returned by earlier calls and URLs whose content is unchanged, as
+        long as they were returned within the last `keep_turns` turns (`turn` is the current turn
+        number), and the new ones are remembered. With `remember_only` (fresh searches) nothing from
+        earlier calls is filtered out, but the results are still remembered.
+        """
+        new, seen = [], []
+        batch_keys = set()
+        batch_entries: Dict[str, Optional[str]] = {}
+        with self._lock:
+            if session_id is not None:
+                session = self._sessions.setdefault(session_id, OrderedDict())
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                session = OrderedDict()
+
+            def returned_before(key: Optional[str], fingerprint: Optional[str] = None) -> bool:
+                if key is None or key not in session:
+                    return False
+                stored_fingerprint, returned_in = session[key]
+                # A known URL only counts as a repeat while its content is unchanged.
+                return stored_fingerprint == fingerprint and self._still_verbatim(returned_in, turn)
+
+            for result in results:
+                text = result.get("content") or result.get("body")
+                fingerprint = content_fingerprint(text) if text else None
+                url_key = "url:" + normalize_url(result["href"]) if result.get("href") else None
+                content_key = "content:" + fingerprint if fingerprint else None
+                keys = {k for k in (url_key, content_key) if k}
+                seen_before = not remember_only and (returned_before(content_key) or returned_before(url_key, fingerprint))
+                if keys & batch_keys or seen_before:
+                    seen.append(result)
+                    continue
+                batch_keys |= keys
+                if url_key:
+                    batch_entries[url_key] = fingerprint
+                if content_key:
+                    batch_entries[content_key] = None
+                new.append(result)
+            if session_id is not None:
+                for key, fingerprint in batch_entries.items():
+                    session[key] = (fingerprint, turn)
+                    session.move_to_end(key)
+                while len(session) > self.max_entries_per_session:
+                    session.popitem(last=False)
+        return new, seen
+
+_search_sessions = SearchSessions(
+    config.WEB_SEARCH_SESSION_LIMIT,
+    config.WEB_SEARCH_SESSION_MAX_ENTRIES,
+    config.MEMORY_KEEP_LAST_TURNS if config.MEMORY_ENABLED else None,
+)
+
+def get_search_sessions() -> SearchSessions:
+    return _search_sessions
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(max_chars, 0)].rsplit(" ", 1)[0]
+    return cut + " …"
+
+@cached_tool("web_search", bypass_arg="fresh")
+def fetch_search_results(query: str, max_results: int, fetch_pages: bool, fresh: bool = False) -> str:
+    """
+    Backend search plus optional page text for the top results, as a JSON list (cached as a whole).
+    Page text is capped at the full token budget, the most fit_to_budget can use for one page, so
+    cache entries stay small.
+    """
+    backend = get_search_backend()
+    results = backend.search(query, max_results=max_results)
+    if fetch_pages and results and hasattr(backend, "fetch_pages"):
+        urls = [r["href"] for r in results[:config.WEB_SEARCH_FETCH_TOP_N] if r.get("href")]
+        pages = backend.fetch_pages(urls)
+        for result in results:
+            if pages.get(result.get("href")):
+                result["content"] = _truncate(pages[result["href"]], config.WEB_SEARCH_TOKEN_BUDGET * CHARS_PER_TOKEN)
+    return json.dumps(results)
+
+def fit_to_budget(results: List[Dict], token_budget: int) -> List[Dict]:
+    """Keeps every snippet and shares the remaining budget between fetched page texts, shortest first."""
+    fitted = [dict(r) for r in results]
+    remaining = token_budget * CHARS_PER_TOKEN - sum(
+        len(json.dumps({k: v for k, v in r.items() if k != "content"})) for r in fitted
+    )
+    with_content = sorted((r for r in fitted if r.get("content")), key=lambda r: len(r["content"]))
+    for i, result in enumerate(with_content):
+        # Budget left unused by shorter pages carries over to the longer ones.
+        share = max(remaining // (len(with_content) - i), 0)
+        if share:
+            result["content"] = _truncate(result["content"], share)
+            remaining -= len(result["content"])
+        else:
+            del result["content"]
+    return fitted
+
+def run_web_search(
+    query: str,
+    max_results: Optional[int] = None,
+    fetch_pages: Optional[bool] = None,
+    session_id: Optional[str] = None,
+    fresh: bool = False,
+    turn: Optional[int] = None,
+) -> str:
+    """
+    Runs a search for the tool. Results already returned in the conversation `session_id` (the
+    checkpointer thread_id) within the last turns are dropped to their title/URL; without a session
+    id (batch runs, CHECKPOINT_BACKEND=none) there is no cross-call dedup.
+    """
+    max_results = min(max(int(max_results or config.WEB_SEARCH_DEFAULT_MAX_RESULTS), 1), config.WEB_SEARCH_MAX_RESULTS_LIMIT)
+    fetch_pages = config.WEB_SEARCH_FETCH_PAGES if fetch_pages is None else fetch_pages
+    raw = fetch_search_results(query, max_results, bool(fetch_pages), fresh=fresh)
+    results = json.loads(raw)
+    if not results:
+        return "No results found."
+
+    # A fresh search exists to get current content back, so earlier results are not filtered out.
+    new, seen = get_search_sessions().split_seen(session_id, results, remember_only=fresh, turn=turn)
+    output = fit_to_budget(new, config.WEB_SEARCH_TOKEN_BUDGET)
+    # Repeats are listed by title/URL only so the model knows they were already returned.
+    output.extend({"title": r.get("title"), "href": r.get("href"), "already_returned": True} for r in seen)
+    return json.dumps(output)
@@ -1,13 +1,17 @@
 # streamlit_app.py
 import streamlit as st
 import json
+import uuid
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
 
 try:
     import config
-    from agent_graph import compiled_agent_graph, AgentState, agent_system_message_content
+    from agent_graph import get_compiled_agent_graph, AgentState, agent_system_message_content
+    from turn_runner import run_turn
+    from conversation_memory import ConversationMemory
+    from response_cache import get_response_cache
 except ImportError as e:
-    st.error(f"Failed to import agent components. Ensure all .py files (config.py, tools_definition.py, agent_graph.py) are correct and in the same directory. Error: {e}")
+    st.error(f"Failed to import agent components. Ensure all .py files (config.py, tools_definition.py, agent_graph.py, turn_runner.py, conversation_memory.py) are correct and in the same directory. Error: {e}")
     st.stop()
 
 st.set_page_config(page_title="🧠 Multi-Tool LLM Agent", layout="wide")
@@ -20,8 +24,34 @@ if not config.GROQ_API_KEY:
     """)
     st.stop()
 
+def messages_to_display(stored_messages):
+    """Converts graph messages from a stored thread into the chat history format used below."""
+    display = []
+    for msg_obj in stored_messages:
+        if isinstance(msg_obj, HumanMessage):
+            display.append({"role": "user", "content": msg_obj.content})
+        elif isinstance(msg_obj, AIMessage):
+            entry = {"role": "assistant", "content": msg_obj.content}
+            if msg_obj.tool_calls:
+                entry["tool_calls"] = msg_obj.tool_calls
+            display.append(entry)
+        elif isinstance(msg_obj, ToolMessage):
+            display.append({"role": "tool", "content": msg_obj.content, "tool_call_id": msg_obj.tool_call_id, "tool_name": msg_obj.name})
+    return display
+
+compiled_graph = get_compiled_agent_graph()
+use_checkpointer = compiled_graph.checkpointer is not None
+
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if use_checkpointer and "thread_id" not in st.session_state:
+    # The thread id lives in the URL, so a reload, a server restart or another replica resumes the same conversation.
+    st.session_state.thread_id = st.query_params.get("thread") or uuid.uuid4().hex
+    st.query_params["thread"] = st.session_state.thread_id
+    stored_state = compiled_graph.get_state({"configurable": {"thread_id": st.session_state.thread_id}})
+    st.session_state.messages = messages_to_display(stored_state.values.get("messages", []))
+if "conversation_memory" not in st.session_state and config.MEMORY_ENABLED:
+    st.session_state.conversation_memory = ConversationMemory()
 
 # --- Display Existing Chat Messages from Session State (MODIFIED) ---
 for message in st.session_state.messages:
@@ -54,88 +84,116 @@ if prompt := st.chat_input("Ask the agent anything..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.status("🤖 Agent is working...", expanded=True) as status_box:
+        status_box = st.status("🤖 Agent is working...", expanded=True)
+        # Created after the status box so the streamed answer renders below it.
+        answer_placeholder = st.empty()
+        with status_box:
             final_llm_answer_content = ""
             tool_calls_for_this_turn = [] # Track tool calls planned in this specific turn
 
-            temp_history_for_graph = []
-            for msg_data in st.session_state.messages:
-                if msg_data["role"] == "user":
-                    temp_history_for_graph.append(HumanMessage(content=msg_data["content"]))
-                elif msg_data["role"] == "assistant":
-                    ai_content = msg_data.get("content", "")
-                    tool_calls_from_history = msg_data.get("tool_calls")
-                    valid_tool_calls = []
-                    if isinstance(tool_calls_from_history, list):
-                        valid_tool_calls = tool_calls_from_history
-                    temp_history_for_graph.append(
-                        AIMessage(content=ai_content, tool_calls=valid_tool_calls)
-                    )
-                elif msg_data["role"] == "tool":
-                    temp_history_for_graph.append(
-                        ToolMessage(
-                            content=msg_data["content"],
-                            tool_call_id=msg_data["tool_call_id"],
-                            name=msg_data.get("tool_name", "unknown_tool")
+            thread_config = {"configurable": {"thread_id": st.session_state.thread_id}} if use_checkpointer else None
+            if use_checkpointer:
+                # Stored state already holds the history, so only this turn's message is sent.
+                turn_messages = [HumanMessage(content=prompt)]
+                if not compiled_graph.get_state(thread_config).values.get("messages"):
+                    turn_messages.insert(0, SystemMessage(content=agent_system_message_content))
+                initial_state: AgentState = {"messages": turn_messages}
+            else:
+                temp_history_for_graph = []
+                for msg_data in st.session_state.messages:
+                    if msg_data["role"] == "user":
+                        temp_history_for_graph.append(HumanMessage(content=msg_data["content"]))
+                    elif msg_data["role"] == "assistant":
+                        ai_content = msg_data.get("content", "")
+                        tool_calls_from_history = msg_data.get("tool_calls")
+                        valid_tool_calls = []
+                        if isinstance(tool_calls_from_history, list):
+                            valid_tool_calls = tool_calls_from_history
+                        temp_history_for_graph.append(
+                            AIMessage(content=ai_content, tool_calls=valid_tool_calls)
+                        )
+                    elif msg_data["role"] == "tool":
+                        temp_history_for_graph.append(
+                            ToolMessage(
+                                content=msg_data["content"],
+                                tool_call_id=msg_data["tool_call_id"],
+                                name=msg_data.get("tool_name", "unknown_tool")
+                            )
                         )
-                    )
             
-            graph_messages_history = [SystemMessage(content=agent_system_message_content)] + temp_history_for_graph
-            initial_state: AgentState = {"messages": graph_messages_history}
+                graph_messages_history = [SystemMessage(content=agent_system_message_content)] + temp_history_for_graph
+                initial_state: AgentState = {"messages": graph_messages_history}
             current_tool_call_id_to_name_map = {}
+            turn_result = None
+            streamed_answer = []
+
+            def show_token(token):
+                streamed_answer.append(token)
+                answer_placeholder.markdown("".join(streamed_answer) + "▌")
+
+            def show_node_update(node_name, output_data):
+                if node_name != "__end__":
+                    status_box.write(f"⚙️ Processing: '{node_name}'...")
+
+                if isinstance(output_data, dict) and "messages" in output_data:
+                    for msg_obj in output_data["messages"]:
+                        if isinstance(msg_obj, AIMessage):
+                            if msg_obj.tool_calls:
+                                # Text streamed alongside a tool call is planning, not the answer.
+                                streamed_answer.clear()
+                                answer_placeholder.empty()
+                                status_box.write(f"🧠 LLM plans to use tool(s):")
+                                for tc in msg_obj.tool_calls:
+                                    status_box.markdown(f"  - Tool: `{tc['name']}`, Args: `{json.dumps(tc['args'])}`")
+                                    current_tool_call_id_to_name_map[tc['id']] = tc['name']
+                                    tool_calls_for_this_turn.append(tc)
+                                if msg_obj.content:
+                                    status_box.write(f"🗣️ LLM says: _{msg_obj.content}_")
+
+                        elif isinstance(msg_obj, ToolMessage):
+                            tool_name_from_message = msg_obj.name or current_tool_call_id_to_name_map.get(msg_obj.tool_call_id, "unknown_tool")
+                            status_box.write(f"🛠️ **Tool Executed:** `{tool_name_from_message}`. Agent is processing the result...")
+
+                            already_logged = False
+                            for logged_msg in st.session_state.messages:
+                                if logged_msg.get("role") == "tool" and logged_msg.get("tool_call_id") == msg_obj.tool_call_id:
+                                    already_logged = True
+                                    break
+                            if not already_logged:
+                                st.session_state.messages.append({
+                                    "role": "tool",
+                                    "content": msg_obj.content,
+                                    "tool_call_id": msg_obj.tool_call_id,
+                                    "tool_name": tool_name_from_message
+                                })
 
             try:
-                for event in compiled_agent_graph.stream(initial_state, {"recursion_limit": 15}):
-                    for node_name, output_data in event.items():
-                        if node_name != "__end__":
-                             status_box.write(f"⚙️ Processing: '{node_name}'...")
-
-                        if isinstance(output_data, dict) and "messages" in output_data:
-                            for msg_obj in output_data["messages"]:
-                                if isinstance(msg_obj, AIMessage):
-                                    if msg_obj.tool_calls:
-                                        status_box.write(f"🧠 LLM plans to use tool(s):")
-                                        for tc in msg_obj.tool_calls:
-                                            status_box.markdown(f"  - Tool: `{tc['name']}`, Args: `{json.dumps(tc['args'])}`")
-                                            current_tool_call_id_to_name_map[tc['id']] = tc['name']
-                                            tool_calls_for_this_turn.append(tc)
-                                        if msg_obj.content:
-                                            status_box.write(f"🗣️ LLM says: _{msg_obj.content}_")
-
-                                elif isinstance(msg_obj, ToolMessage):
-                                    tool_name_from_message = msg_obj.name or current_tool_call_id_to_name_map.get(msg_obj.tool_call_id, "unknown_tool")
-                                    status_box.write(f"🛠️ **Tool Executed:** `{tool_name_from_message}`. Agent is processing the result...")
-                                    
-                                    already_logged = False
-                                    for logged_msg in st.session_state.messages:
-                                        if logged_msg.get("role") == "tool" and logged_msg.get("tool_call_id") == msg_obj.tool_call_id:
-                                            already_logged = True
-                                            break
-                                    if not already_logged:
-                                        st.session_state.messages.append({
-                                            "role": "tool",
-                                            "content": msg_obj.content, 
-                                            "tool_call_id": msg_obj.tool_call_id,
-                                            "tool_name": tool_name_from_message
-                                        })
-                                    pass
-
-                        if node_name == "__end__":
-                            status_box.update(label="✔️ Agent: Task complete!", state="complete", expanded=False)
-                            break 
-                    if node_name == "__end__":
-                        break 
-                
-                final_graph_state_after_turn = compiled_agent_graph.invoke(initial_state, {"recursion_limit":15})
-                
-                if final_graph_state_after_turn and final_graph_state_after_turn.get("messages"):
-                    last_msg_in_turn = final_graph_state_after_turn["messages"][-1]
-                    if isinstance(last_msg_in_turn, AIMessage) and not last_msg_in_turn.tool_calls:
-                        final_llm_answer_content = last_msg_in_turn.content
-                    elif isinstance(last_msg_in_turn, AIMessage) and last_msg_in_turn.content:
-                        if not final_llm_answer_content: 
-                             final_llm_answer_content = last_msg_in_turn.content
-                
+                # Single pass: the streamed updates drive the status box and also build the final state.
+                conversation_memory = st.session_state.get("conversation_memory")
+                configurable = dict(thread_config["configurable"]) if thread_config else {}
+                if conversation_memory:
+                    configurable["conversation_memory"] = conversation_memory
+                turn_result = run_turn(
+                    compiled_graph, initial_state, on_update=show_node_update, recursion_limit=15,
+                    configurable=configurable or None,
+                    on_token=show_token,
+                    response_cache=get_response_cache(),
+                )
+                if turn_result.cache_hit:
+                    cache_stats = get_response_cache().snapshot()
+                    status_box.write(f"⚡ Answered from the response cache ({turn_result.cache_hit} match; hit rate {cache_stats['hit_rate']:.0%}).")
+                if turn_result.time_to_first_token is not None:
+                    status_box.write(f"⏱️ First token after {turn_result.time_to_first_token:.2f}s.")
+                if conversation_memory and conversation_memory.last_metrics.tokens_saved > 0:
+                    memory_metrics = conversation_memory.last_metrics
+                    status_box.write(
+                        f"🧹 Memory: sent {memory_metrics.tokens_after} of {memory_metrics.tokens_before} history tokens "
+                        f"over {memory_metrics.llm_calls} LLM call(s) (~{memory_metrics.tokens_saved} saved, "
+                        f"{memory_metrics.turns_summarized} older turn(s) summarized)."
+                    )
+                status_box.update(label="✔️ Agent: Task complete!", state="complete", expanded=False)
+                final_llm_answer_content = turn_result.final_answer
+
             except Exception as e:
                 st.error(f"An error occurred during agent execution: {str(e)}")
                 status_box.update(label="❌ Agent: Error!", state="error", expanded=True)
@@ -143,17 +201,16 @@ if prompt := st.chat_input("Ask the agent anything..."):
 
             assistant_message_to_store = {}
             if final_llm_answer_content:
-                st.markdown(final_llm_answer_content) 
+                answer_placeholder.markdown(final_llm_answer_content)
                 assistant_message_to_store = {"role": "assistant", "content": final_llm_answer_content}
             elif tool_calls_for_this_turn: 
                 final_content_for_tool_planning_turn = ""
                 temp_ai_content_with_tool_call = ""
                 
                 # Find the AI message content that accompanied these tool_calls_for_this_turn
-                # This requires looking at the messages produced in the current turn's stream.
-                # A simple way is to check if the last message in the graph state for *this turn* had these tool calls and content.
-                if final_graph_state_after_turn and final_graph_state_after_turn.get("messages"):
-                    last_message_obj = final_graph_state_after_turn["messages"][-1]
+                # by looking at the last message produced in this turn's single graph run.
+                if turn_result and turn_result.new_messages:
+                    last_message_obj = turn_result.new_messages[-1]
                     # Check if this last message corresponds to the current tool planning phase
                     if isinstance(last_message_obj, AIMessage) and last_message_obj.tool_calls:
                         # Compare tool call IDs to be more precise
@@ -168,7 +225,7 @@ if prompt := st.chat_input("Ask the agent anything..."):
                     final_content_for_tool_planning_turn = "Okay, I will use my tools for that."
 
 
-                st.markdown(final_content_for_tool_planning_turn)
+                answer_placeholder.markdown(final_content_for_tool_planning_turn)
                 assistant_message_to_store = {
                     "role": "assistant",
                     "content": final_content_for_tool_planning_turn,
@@ -177,7 +234,7 @@ if prompt := st.chat_input("Ask the agent anything..."):
             else: 
                 if not final_llm_answer_content:
                     fallback_message = "I'm not sure how to respond to that or an issue occurred."
-                    st.markdown(fallback_message)
+                    answer_placeholder.markdown(fallback_message)
                     assistant_message_to_store = {"role": "assistant", "content": fallback_message}
             
             if assistant_message_to_store:
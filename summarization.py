@@ -0,0 +1,123 @@
+# summarization.py
+import re
+from typing import List, Optional
+
+from langchain_core.messages import HumanMessage
+
+import config
+
+CHARS_PER_TOKEN = 4
+MAX_REDUCE_DEPTH = 4
+
+SUMMARIZER_SYSTEM_PROMPT = "You are an expert at summarizing text. Provide a clear, concise, and neutral summary of the provided content. Focus on the main facts and key takeaways. Do not add any preamble like 'Here is the summary:' or opinions unless the text explicitly contains them."
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text with LLaMA-style tokenizers)."""
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text at a word boundary so that it fits `max_tokens` (estimated), marking the cut."""
+    marker = "\n[... truncated]"
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - len(marker), 0)].rsplit(" ", 1)[0] + marker
+
+def _split_units(text: str, max_tokens: int) -> List[str]:
+    """Breaks text into paragraphs, falling back to sentences and then words for oversized pieces."""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            words = sentence.split()
+            current = []
+            for word in words:
+                if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+                    units.append(" ".join(current))
+                    current = []
+                current.append(word)
+            if current:
+                units.append(" ".join(current))
+    return units
+
+def split_into_chunks(text: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Packs paragraph/sentence units greedily into chunks of at most `chunk_tokens` (estimated),
+    repeating up to `overlap_tokens` of trailing units at the start of the next chunk for context.
+    Sizes are counted in characters including the separators, so joined chunks stay within the limit.
+    """
+    separator = "\n\n"
+    max_chars = (chunk_tokens + 1) * CHARS_PER_TOKEN - 1
+    max_overlap_chars = (overlap_tokens + 1) * CHARS_PER_TOKEN - 1
+
+    def joined_chars(units_chars: int, count: int) -> int:
+        return units_chars + len(separator) * max(count - 1, 0)
+
+    chunks = []
+    current: List[str] = []
+    current_chars = 0
+    for unit in _split_units(text, chunk_tokens):
+        if current and joined_chars(current_chars + len(unit), len(current) + 1) > max_chars:
+            chunks.append(separator.join(current))
+            overlap: List[str] = []
+            overlap_chars = 0
+            for previous in reversed(current):
+                candidate_chars = overlap_chars + len(previous)
+                if (joined_chars(candidate_chars, len(overlap) + 1) > max_overlap_chars
+                        or joined_chars(candidate_chars + len(unit), len(overlap) + 2) > max_chars):
+                    break
+                overlap.insert(0, previous)
+                overlap_chars = candidate_chars
+            current, current_chars = overlap, overlap_chars
+        current.append(unit)
+        current_chars += len(unit)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+def _build_messages(text: str, query_context: Optional[str], instruction: str) -> List[HumanMessage]:
+    system_prompt_message = SUMMARIZER_SYSTEM_PROMPT
+    if query_context:
+        system_prompt_message += f"\nThe summary should specifically highlight information relevant to this context or question: '{query_context}'"
+    return [
+        HumanMessage(content=system_prompt_message),
+        HumanMessage(content=f"{instruction}\n\nTEXT_START\n{text}\nTEXT_END"),
+    ]
+
+def summarize_text(llm, text_content: str, query_context: Optional[str] = None) -> str:
+    """
+    Summarizes text with a single LLM call when it fits the single-pass budget, otherwise map-reduce:
+    chunks are summarized concurrently (bounded by SUMMARIZER_MAX_CONCURRENCY) and the partial
+    summaries are combined, re-chunking them recursively while they are still too long. If they are
+    still over the single-pass budget after MAX_REDUCE_DEPTH rounds, they are truncated to it.
+    """
+    if estimate_tokens(text_content) <= config.SUMMARIZER_SINGLE_PASS_MAX_TOKENS:
+        return llm.invoke(_build_messages(text_content, query_context, "Please summarize this text:")).content
+
+    current_text = text_content
+    for _ in range(MAX_REDUCE_DEPTH):
+        chunks = split_into_chunks(current_text, config.SUMMARIZER_CHUNK_TOKENS, config.SUMMARIZER_CHUNK_OVERLAP_TOKENS)
+        batch_inputs = [
+            _build_messages(chunk, query_context, f"Please summarize this text. It is part {i + 1} of {len(chunks)} of a longer document:")
+            for i, chunk in enumerate(chunks)
+        ]
+        responses = llm.batch(batch_inputs, config={"max_concurrency": config.SUMMARIZER_MAX_CONCURRENCY})
+        current_text = "\n\n".join(response.content for response in responses)
+        if estimate_tokens(current_text) <= config.SUMMARIZER_SINGLE_PASS_MAX_TOKENS:
+            break
+    else:
+        current_text = truncate_to_tokens(current_text, config.SUMMARIZER_SINGLE_PASS_MAX_TOKENS)
+
+    return llm.invoke(_build_messages(
+        current_text,
+        query_context,
+        "The following are summaries of consecutive parts of one document. Combine them into a single coherent summary:",
+    )).content
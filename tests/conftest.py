@@ -0,0 +1,28 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import ScriptedChatModel  # noqa: E402
+from llm_registry import set_llm_override  # noqa: E402
+from search_backends import StaticCorpusBackend, set_search_backend  # noqa: E402
+from tool_cache import set_tool_cache  # noqa: E402
+
+SEARCH_CORPUS = [
+    {"title": "France", "href": "https://example.org/france", "body": "Paris is the capital of France."},
+    {"title": "Photosynthesis", "href": "https://example.org/photosynthesis", "body": "Plants turn light into chemical energy."},
+]
+
+@pytest.fixture(autouse=True)
+def offline_agent():
+    """Runs every test against the scripted chat model and the static search corpus."""
+    set_llm_override(ScriptedChatModel())
+    set_search_backend(StaticCorpusBackend(SEARCH_CORPUS))
+    set_tool_cache(None)
+    yield
+    set_llm_override(None)
+    set_search_backend(None)
+    set_tool_cache(None)
@@ -0,0 +1,24 @@
+# tests/test_calculator.py
+import json
+
+import pytest
+
+import calculator_engine
+from calculator_engine import CalculatorError
+from tools_definition import batch_calculator
+
+def test_complex_results_are_rejected():
+    with pytest.raises(CalculatorError):
+        calculator_engine.evaluate("(-8)**(1/3)")
+
+def test_batch_reports_failed_expressions_individually():
+    output = json.loads(batch_calculator.invoke({"expressions": ["25*76", "(-8)**(1/3)", "1/0"]}))
+
+    assert output[0] == {"expression": "25*76", "result": 1900}
+    assert output[1]["expression"] == "(-8)**(1/3)" and "complex" in output[1]["error"]
+    assert "error" in output[2]
+
+def test_vectorized_expression():
+    output = json.loads(batch_calculator.invoke({"expression": "price * qty", "variables": {"price": [10, 20], "qty": [1, 3]}}))
+
+    assert output == [{"expression": "price * qty", "result": [10.0, 60.0]}]
@@ -0,0 +1,108 @@
+# tests/test_checkpointing.py
+import sqlite3
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agent_graph import create_agent_graph
+from checkpointing import SQLiteCheckpointSaver
+from fake_llm import ScriptedChatModel
+from turn_runner import run_turn
+
+SCRIPT = [
+    {"tool_calls": [{"name": "calculator", "args": {"expression": "25*76"}}]},
+    "25*76 is 1900.",
+]
+
+def _run_turns(graph, thread_id, prompts, first=True):
+    results = []
+    for i, prompt in enumerate(prompts):
+        messages = [HumanMessage(content=prompt)]
+        if first and i == 0:
+            messages.insert(0, SystemMessage(content="system"))
+        results.append(run_turn(graph, {"messages": messages}, configurable={"thread_id": thread_id}))
+    return results
+
+def test_multi_turn_state_survives_reopening(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    llm = ScriptedChatModel(script=SCRIPT)
+
+    saver = SQLiteCheckpointSaver(path)
+    results = _run_turns(create_agent_graph(llm=llm, checkpointer=saver), "t1", ["q1", "q2", "q3"])
+    saver.close()
+
+    # Each turn only sent its own message, yet sees the whole thread.
+    assert [len(r.final_state["messages"]) for r in results] == [5, 9, 13]
+    assert all(r.llm_calls == 2 and r.tool_invocations == 1 for r in results)
+
+    reopened = SQLiteCheckpointSaver(path)
+    graph = create_agent_graph(llm=llm, checkpointer=reopened)
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = graph.get_state(config).values["messages"]
+    assert [type(m) for m in messages[:5]] == [SystemMessage, HumanMessage, AIMessage, ToolMessage, AIMessage]
+    assert messages == results[-1].final_state["messages"]
+    assert messages[3].content == "1900"
+
+    # A resumed thread continues where it stopped.
+    resumed = _run_turns(graph, "t1", ["q4"], first=False)[0]
+    assert len(resumed.final_state["messages"]) == 17
+
+    history = list(graph.get_state_history(config))
+    assert len(history) == len(list(reopened.list(config)))
+    message_counts = [len(snapshot.values.get("messages", [])) for snapshot in history]
+    assert message_counts == sorted(message_counts, reverse=True)
+    assert message_counts[0] == 17
+    # Every step of every turn is checkpointed: input + agent/tools/agent steps per turn.
+    assert len(history) >= 4 * 4
+    assert history[-1].parent_config is None
+
+    # Old checkpoints can be read back with their own state.
+    earlier = graph.get_state(history[5].config)
+    assert len(earlier.values["messages"]) == message_counts[5]
+    reopened.close()
+
+def test_threads_are_isolated_and_messages_stored_once(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    saver = SQLiteCheckpointSaver(path)
+    graph = create_agent_graph(llm=ScriptedChatModel(script=SCRIPT), checkpointer=saver)
+    _run_turns(graph, "a", ["q1", "q2"])
+    _run_turns(graph, "b", ["other"])
+
+    assert len(graph.get_state({"configurable": {"thread_id": "a"}}).values["messages"]) == 9
+    assert len(graph.get_state({"configurable": {"thread_id": "b"}}).values["messages"]) == 5
+    saver.close()
+
+    conn = sqlite3.connect(path)
+    payloads = conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+    conn.close()
+    # Identical messages (system prompt, tool results) are shared; no message is stored per checkpoint.
+    assert payloads <= 9 + 5
+
+def test_delete_thread(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"))
+    graph = create_agent_graph(llm=ScriptedChatModel(script=["hi"]), checkpointer=saver)
+    _run_turns(graph, "gone", ["q1"])
+    saver.delete_thread("gone")
+
+    assert saver.get_tuple({"configurable": {"thread_id": "gone"}}) is None
+    assert list(saver.list({"configurable": {"thread_id": "gone"}})) == []
+    saver.close()
+
+def test_delete_thread_removes_unshared_payloads(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    saver = SQLiteCheckpointSaver(path)
+    graph = create_agent_graph(llm=ScriptedChatModel(script=SCRIPT), checkpointer=saver)
+    _run_turns(graph, "a", ["q1", "q2"])
+    _run_turns(graph, "b", ["other"])
+
+    def payload_count():
+        return saver._conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+    before = payload_count()
+    saver.delete_thread("a")
+    # Thread b still needs the shared system prompt and tool result.
+    assert 0 < payload_count() < before
+    assert len(graph.get_state({"configurable": {"thread_id": "b"}}).values["messages"]) == 5
+
+    saver.delete_thread("b")
+    assert payload_count() == 0
+    saver.close()
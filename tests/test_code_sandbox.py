@@ -0,0 +1,33 @@
+# tests/test_code_sandbox.py
+import threading
+import time
+
+from code_sandbox import SandboxPool
+
+def test_waiting_for_a_worker_counts_against_the_timeout():
+    pool = SandboxPool(size=1, timeout_seconds=1.5, cpu_seconds=5, memory_limit_mb=256, max_output_chars=1000,
+                       max_executions_per_worker=100)
+    try:
+        first = threading.Thread(target=pool.execute, args=("while True: pass",), kwargs={"timeout_seconds": 0.8})
+        first.start()
+        time.sleep(0.1)
+        started = time.perf_counter()
+        result = pool.execute("while True: pass")
+        elapsed = time.perf_counter() - started
+        first.join()
+
+        assert result["execution_status"] == "error"
+        # The wait for the busy worker and the run share one 1.5s deadline.
+        assert elapsed < 1.5 + 0.3
+    finally:
+        pool.shutdown()
+
+def test_executes_code_and_captures_stdout():
+    pool = SandboxPool(size=1, timeout_seconds=10, cpu_seconds=5, memory_limit_mb=256, max_output_chars=1000,
+                       max_executions_per_worker=100)
+    try:
+        result = pool.execute("print(6 * 7)")
+        assert result["execution_status"] == "success"
+        assert result["stdout"].strip() == "42"
+    finally:
+        pool.shutdown()
@@ -0,0 +1,72 @@
+# tests/test_conversation_memory.py
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from conversation_memory import SUMMARY_PREFIX, ConversationMemory, count_tokens
+
+def _turn(i, tool_output=""):
+    messages = [HumanMessage(content=f"question {i}")]
+    if tool_output:
+        messages += [
+            AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"query": f"q{i}"}, "id": f"call-{i}"}]),
+            ToolMessage(content=tool_output, tool_call_id=f"call-{i}", name="web_search"),
+        ]
+    return messages + [AIMessage(content=f"answer {i}")]
+
+def _history(turns, tool_output="result " * 400, opening="question 0"):
+    messages = [SystemMessage(content="system")]
+    for i in range(turns):
+        messages += _turn(i, tool_output)
+    messages[1] = HumanMessage(content=opening)
+    return messages
+
+def test_stale_tool_outputs_are_truncated_and_recent_turns_kept():
+    memory = ConversationMemory(token_budget=100_000, keep_last_turns=2, tool_output_max_tokens=20, summarize=False)
+    history = _history(4)
+
+    prepared = memory.prepare(history)
+
+    tool_outputs = [m.content for m in prepared if isinstance(m, ToolMessage)]
+    assert all("stale tool output truncated" in c for c in tool_outputs[:2])
+    assert tool_outputs[2:] == [history[-2].content, history[-2].content]
+    assert memory.last_metrics.tool_outputs_compacted == 2
+    assert memory.last_metrics.tokens_after < memory.last_metrics.tokens_before
+    assert memory.last_metrics.tokens_saved == count_tokens(history) - count_tokens(prepared)
+
+def test_old_turns_are_folded_into_a_summary():
+    memory = ConversationMemory(token_budget=200, keep_last_turns=1, tool_output_max_tokens=20, summarize=True)
+
+    prepared = memory.prepare(_history(4))
+
+    assert isinstance(prepared[1], SystemMessage) and prepared[1].content.startswith(SUMMARY_PREFIX)
+    assert memory.summary
+    # The one verbatim turn alone is over budget, so every older turn is folded.
+    assert memory.folded_turns == memory.last_metrics.turns_summarized == 3
+    assert [m.content for m in prepared if isinstance(m, HumanMessage)] == ["question 3"]
+
+def test_metrics_cover_every_step_of_a_turn():
+    memory = ConversationMemory(token_budget=200, keep_last_turns=1, tool_output_max_tokens=20, summarize=False)
+    history = _history(4)[:-1] + [HumanMessage(content="question 4")]
+
+    memory.prepare(history)
+    folded = memory.last_metrics.turns_summarized
+    # The tool step of the same turn folds nothing new, but the turn's metrics keep the fold.
+    memory.prepare(history + _turn(4, "short")[1:3])
+
+    assert folded > 0
+    assert memory.last_metrics.llm_calls == 2
+    assert memory.last_metrics.turns_summarized == folded
+    # The next user message starts a new turn.
+    memory.prepare(history + _turn(4, "short")[1:] + [HumanMessage(content="question 5")])
+    assert memory.last_metrics.llm_calls == 1
+
+def test_a_different_conversation_resets_the_summary():
+    memory = ConversationMemory(token_budget=200, keep_last_turns=1, tool_output_max_tokens=20, summarize=True)
+    memory.prepare(_history(4))
+    assert memory.summary and memory.folded_turns
+
+    prepared = memory.prepare(_history(2, tool_output="", opening="another conversation"))
+
+    assert memory.folded_turns == 0
+    assert not memory.summary
+    assert not any(m.content.startswith(SUMMARY_PREFIX) for m in prepared if isinstance(m, SystemMessage))
+    assert prepared[1].content == "another conversation"
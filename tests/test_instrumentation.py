@@ -0,0 +1,99 @@
+# tests/test_instrumentation.py
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent_graph import create_agent_graph
+from fake_llm import ScriptedChatModel
+from instrumentation import InMemorySink, JsonlFileSink, PrometheusSink, Span, Tracer, set_tracer, traced_node
+from turn_runner import run_turn
+
+@pytest.fixture
+def sink():
+    memory_sink = InMemorySink()
+    set_tracer(Tracer([memory_sink]))
+    yield memory_sink
+    set_tracer(None)
+
+def _run(script, prompt="question"):
+    state = {"messages": [SystemMessage(content="system"), HumanMessage(content=prompt)]}
+    return run_turn(create_agent_graph(llm=ScriptedChatModel(script=script)), state)
+
+def _tool_turn(*tool_calls):
+    return [{"tool_calls": [{"name": name, "args": args} for name, args in tool_calls]}, "Done."]
+
+def test_spans_nest_turn_nodes_and_tools(sink):
+    _run(_tool_turn(("calculator", {"expression": "25*76"})))
+
+    by_name = {}
+    for span in sink.spans:
+        by_name.setdefault(span.name, []).append(span)
+    turn = by_name["turn"][0]
+    assert [s.name for s in sink.spans if s.parent_id == turn.span_id] == ["agent", "tools", "agent"]
+    assert by_name["calculator"][0].parent_id == by_name["tools"][0].span_id
+    assert {s.trace_id for s in sink.spans} == {turn.trace_id}
+    assert by_name["calculator"][0].output_size == len("1900")
+    assert turn.attributes["llm_calls"] == 2 and turn.attributes["tool_calls"] == 1
+
+def test_tool_error_strings_are_recorded_as_errors(sink):
+    _run(_tool_turn(("calculator", {"expression": "1/0"})))
+
+    tool_span = next(s for s in sink.spans if s.kind == "tool")
+    assert tool_span.error and tool_span.error.startswith("Error in calculator")
+
+def test_token_usage_is_summed_per_node(sink):
+    @traced_node("agent")
+    def node(state, config):
+        return {"messages": [
+            AIMessage(content="a", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12}),
+            AIMessage(content="b", response_metadata={"token_usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}}),
+        ]}
+
+    node({"messages": []}, {})
+
+    assert sink.spans[0].attributes == {"input_tokens": 15, "output_tokens": 3, "total_tokens": 18}
+
+def test_tool_cache_hits_are_annotated(sink):
+    _run(_tool_turn(("web_search", {"query": "capital of France"})))
+    _run(_tool_turn(("web_search", {"query": "capital of France"})))
+
+    assert [s.attributes.get("cache_hit") for s in sink.spans if s.kind == "tool"] == [False, True]
+
+def test_jsonl_sink_writes_one_span_per_line(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer([JsonlFileSink(str(path))])
+    with tracer.span("outer", "turn"):
+        with tracer.span("inner", "node", {"messages": ["abc"]}):
+            pass
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["inner", "outer"]
+    assert records[0]["parent_id"] == records[1]["span_id"]
+    assert records[0]["input_size"] == 3
+
+def test_prometheus_sink_renders_counters():
+    sink = PrometheusSink()
+    sink.export(Span("agent", "node", "t", "s1", duration_ms=5, attributes={"input_tokens": 7, "output_tokens": 3}))
+    sink.export(Span("agent", "node", "t", "s2", duration_ms=2.5, error="boom"))
+    sink.export(Span("web_search", "tool", "t", "s3", attributes={"cache_hit": True}))
+
+    lines = set(sink.render().splitlines())
+    assert 'agent_span_total{kind="node",name="agent"} 2' in lines
+    assert 'agent_span_duration_ms_sum{kind="node",name="agent"} 7.5' in lines
+    assert 'agent_span_errors_total{kind="node",name="agent"} 1' in lines
+    assert 'agent_llm_tokens_total{kind="node",name="agent",type="input_tokens"} 7' in lines
+    assert 'agent_tool_cache_lookups_total{kind="tool",name="web_search",result="hit"} 1' in lines
+
+def test_disabled_tracing_calls_straight_through():
+    sink = InMemorySink()
+    set_tracer(Tracer([sink], enabled=False))
+    try:
+        result = _run(["Hello!"])
+        assert traced_node("x")(lambda state, config: "raw")({}, {}) == "raw"
+    finally:
+        set_tracer(None)
+
+    assert result.final_answer == "Hello!"
+    assert sink.spans == []
+    assert not Tracer([]).enabled
@@ -0,0 +1,27 @@
+# tests/test_main.py
+import agent_graph
+import main
+from checkpointing import SQLiteCheckpointSaver, set_checkpointer
+from fake_llm import ScriptedChatModel
+from llm_registry import set_llm_override
+
+def test_run_request_against_default_checkpointed_graph(tmp_path, monkeypatch):
+    set_llm_override(ScriptedChatModel(script=["Paris."]))
+    set_checkpointer(SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3")))
+    monkeypatch.setattr(agent_graph, "_compiled_agent_graph", None)
+    try:
+        graph = agent_graph.get_compiled_agent_graph()
+        assert graph.checkpointer is not None
+
+        first = main.run_request(graph, {"id": 1, "prompt": "Capital of France?"}, recursion_limit=15)
+        second = main.run_request(graph, {"id": 1, "prompt": "Capital of France?"}, recursion_limit=15)
+    finally:
+        set_checkpointer(None)
+
+    assert first["status"] == "success", first
+    assert first["answer"] == "Paris."
+    # Reruns of the same id start a fresh thread instead of continuing the earlier one.
+    assert second["status"] == "success" and second["llm_calls"] == 1
+
+def test_build_graph_for_batch_has_no_checkpointer():
+    assert main.build_graph(use_fake_llm=False).checkpointer is None
@@ -0,0 +1,103 @@
+# tests/test_response_cache.py
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent_graph import create_agent_graph
+from fake_llm import ScriptedChatModel
+from response_cache import ResponseCache
+from search_backends import set_search_backend
+from turn_runner import run_turn
+
+def _cache(**kwargs):
+    return ResponseCache(**{"max_entries": 16, "ttl_seconds": 60, "similarity_threshold": 0.85, **kwargs})
+
+def _opening_state(prompt):
+    return {"messages": [SystemMessage(content="system"), HumanMessage(content=prompt)]}
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Who is the CEO of Apple", "Who was the CEO of Apple"),
+    ("what will the weather be in Paris", "what was the weather in Paris"),
+    ("summarize the history of Iran", "summarize the history of Iraq"),
+    ("summarize the history of Austria", "summarize the history of Australia"),
+    ("Is Paris the capital of France", "Is Paris not the capital of France"),
+    ("What's the capital of France and 25*76?", "what is the capital of France and 25 * 77"),
+])
+def test_different_questions_miss(stored, asked):
+    cache = _cache()
+    cache.store(stored, "cached answer")
+
+    assert cache.lookup(asked) == (None, None)
+
+@pytest.mark.parametrize("stored, asked", [
+    ("What's the capital of France and 25*76?", "what is the capital of France and 25 * 76"),
+    ("Who is the CEO of Apple?", "who's the CEO of Apple"),
+    ("Please tell me the capital of France", "capital of France?"),
+    ("Explain photosynthesis simply", "explain photosynthesis"),
+])
+def test_rephrased_questions_hit(stored, asked):
+    cache = _cache()
+    cache.store(stored, "cached answer")
+
+    answer, hit = cache.lookup(asked)
+    assert answer == "cached answer"
+    assert hit in ("exact", "semantic")
+
+def test_similar_prompt_for_another_subject_runs_the_graph():
+    cache = _cache()
+    graph = create_agent_graph(llm=ScriptedChatModel(script=["An answer about Iraq."]))
+    cache.store("summarize the history of Iran", "An answer about Iran.")
+
+    result = run_turn(graph, _opening_state("summarize the history of Iraq"), response_cache=cache)
+
+    assert result.cache_hit is None
+    assert result.llm_calls == 1
+    assert result.final_answer == "An answer about Iraq."
+
+def test_threshold_decides_near_matches():
+    strict = _cache(similarity_threshold=0.99)
+    strict.store("Explain photosynthesis simply", "cached answer")
+
+    assert strict.lookup("explain photosynthesis") == (None, None)
+    assert strict.lookup("explain photosynthesis simply!") == ("cached answer", "exact")
+
+def test_entries_expire_after_ttl():
+    cache = _cache(ttl_seconds=0.05)
+    cache.store("capital of France", "Paris")
+    time.sleep(0.1)
+
+    assert cache.lookup("capital of France") == (None, None)
+    assert cache.stats.expirations == 1
+    assert cache.snapshot()["entries"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(max_entries=2)
+    cache.store("capital of France", "Paris")
+    cache.store("capital of Spain", "Madrid")
+    cache.lookup("capital of France")
+    cache.store("capital of Italy", "Rome")
+
+    assert cache.stats.evictions == 1
+    assert cache.lookup("capital of Spain") == (None, None)
+    assert cache.lookup("capital of France") == ("Paris", "exact")
+    assert cache.lookup("capital of Italy") == ("Rome", "exact")
+
+class _FailingBackend:
+    def search(self, query, max_results):
+        raise RuntimeError("ddg down")
+
+def test_turn_with_failed_tool_is_not_cached():
+    set_search_backend(_FailingBackend())
+    cache = _cache()
+    llm = ScriptedChatModel(script=[
+        {"tool_calls": [{"name": "web_search", "args": {"query": "capital of France"}}]},
+        "Sorry, search failed.",
+    ])
+
+    result = run_turn(create_agent_graph(llm=llm), _opening_state("Capital of France"), response_cache=cache)
+
+    assert result.tool_results[0].content.startswith("Error")
+    assert result.final_answer == "Sorry, search failed."
+    assert cache.stats.skipped_stores == 1
+    assert cache.lookup("Capital of France") == (None, None)
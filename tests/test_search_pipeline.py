@@ -0,0 +1,106 @@
+# tests/test_search_pipeline.py
+import json
+
+import pytest
+
+import config
+import search_pipeline
+from search_backends import StaticCorpusBackend, set_search_backend
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent_graph import create_agent_graph
+from checkpointing import SQLiteCheckpointSaver
+from fake_llm import ScriptedChatModel
+from search_pipeline import SearchSessions, fetch_search_results, run_web_search
+from tool_cache import MemoryCacheBackend, ToolCache, set_tool_cache
+from turn_runner import run_turn
+
+@pytest.fixture(autouse=True)
+def fresh_sessions(monkeypatch):
+    monkeypatch.setattr(search_pipeline, "_search_sessions", SearchSessions(max_sessions=8, max_entries_per_session=100, keep_turns=2))
+    # Every search reaches the backend, so content changes are visible without waiting for the cache TTL.
+    monkeypatch.setattr(config, "TOOL_CACHE_ENABLED", False)
+
+def _search(query, session_id="thread-1", **kwargs):
+    return json.loads(run_web_search(query, session_id=session_id, **kwargs))
+
+def _weather_corpus(body):
+    return [{"title": "London weather", "href": "https://weather.example/london", "body": body}]
+
+def test_repeated_results_are_listed_without_body():
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Rain, 12C")))
+
+    assert _search("weather London")[0]["body"] == "Rain, 12C"
+    assert _search("London weather") == [
+        {"title": "London weather", "href": "https://weather.example/london", "already_returned": True}
+    ]
+    # Other conversations are unaffected.
+    assert _search("weather London", session_id="thread-2")[0]["body"] == "Rain, 12C"
+
+def test_fresh_search_returns_changed_and_unchanged_content():
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Rain, 12C")))
+    _search("weather London", fresh=True)
+
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Sunny, 18C")))
+    assert _search("weather London", fresh=True)[0]["body"] == "Sunny, 18C"
+    # A fresh search never drops results, even when nothing changed.
+    assert _search("weather London", fresh=True)[0]["body"] == "Sunny, 18C"
+
+def test_known_url_with_new_content_is_not_a_repeat():
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Rain, 12C")))
+    _search("weather London")
+
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Sunny, 18C")))
+    assert _search("weather London")[0]["body"] == "Sunny, 18C"
+
+def test_results_from_turns_memory_compacts_are_returned_in_full():
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Rain, 12C")))
+    _search("weather London", turn=1)
+
+    assert _search("weather London", turn=2)[0].get("already_returned")
+    # Turn 1 has left the verbatim window (keep_turns=2), so its copy may have been truncated.
+    assert _search("weather London", turn=3)[0]["body"] == "Rain, 12C"
+    assert _search("weather London", turn=4)[0].get("already_returned")
+
+def test_checkpointed_turns_see_full_results_once_out_of_window(tmp_path):
+    set_search_backend(StaticCorpusBackend(_weather_corpus("Rain, 12C")))
+    llm = ScriptedChatModel(script=[{"tool_calls": [{"name": "web_search", "args": {"query": "weather London"}}]}, "Done."])
+    graph = create_agent_graph(llm=llm, checkpointer=SQLiteCheckpointSaver(str(tmp_path / "threads.sqlite3")))
+
+    outputs = []
+    for i in range(3):
+        messages = [HumanMessage(content=f"London weather, take {i}")]
+        if i == 0:
+            messages.insert(0, SystemMessage(content="system"))
+        result = run_turn(graph, {"messages": messages}, configurable={"thread_id": "thread-1"})
+        outputs.append(json.loads(result.tool_results[0].content)[0])
+
+    assert outputs[0]["body"] == "Rain, 12C"
+    assert outputs[1].get("already_returned")
+    assert outputs[2]["body"] == "Rain, 12C"
+
+def test_duplicate_urls_and_contents_within_one_call():
+    sessions = SearchSessions(max_sessions=2, max_entries_per_session=10)
+    results = [
+        {"title": "A", "href": "https://Example.org/page/?utm_source=x", "body": "one"},
+        {"title": "B", "href": "https://example.org/page", "body": "two"},
+        {"title": "C", "href": "https://other.org/", "body": "One "},
+    ]
+    new, seen = sessions.split_seen(None, results)
+    assert [r["title"] for r in new] == ["A"]
+    assert [r["title"] for r in seen] == ["B", "C"]
+
+def test_cached_page_text_is_capped(monkeypatch):
+    monkeypatch.setattr(config, "TOOL_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "WEB_SEARCH_TOKEN_BUDGET", 100)
+    cache = ToolCache(MemoryCacheBackend(10), {}, 60)
+    set_tool_cache(cache)
+    set_search_backend(StaticCorpusBackend([
+        {"title": "Long page", "href": "https://example.org/long", "body": "long page", "content": "word " * 10000},
+    ]))
+
+    results = json.loads(fetch_search_results("long page", 3, True))
+    cap = 100 * 4 + len(" …")
+    assert len(results[0]["content"]) <= cap
+    cached = next(iter(cache.backend._entries.values()))[1]
+    assert len(cached) < 2 * cap
@@ -0,0 +1,83 @@
+# tests/test_summarization.py
+import pytest
+from langchain_core.messages import AIMessage
+
+import config
+from summarization import MAX_REDUCE_DEPTH, estimate_tokens, split_into_chunks, summarize_text
+
+class RecordingLLM:
+    """Returns `reply(text)` for the text between TEXT_START/TEXT_END and records every call."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.invoked = []
+        self.batches = []
+
+    @staticmethod
+    def _text(messages):
+        return messages[-1].content.split("TEXT_START\n", 1)[1].rsplit("\nTEXT_END", 1)[0]
+
+    def invoke(self, messages):
+        self.invoked.append(messages)
+        return AIMessage(content=self.reply(self._text(messages)))
+
+    def batch(self, inputs, config=None):
+        self.batches.append(inputs)
+        return [AIMessage(content=self.reply(self._text(messages))) for messages in inputs]
+
+@pytest.fixture
+def small_budgets(monkeypatch):
+    monkeypatch.setattr(config, "SUMMARIZER_SINGLE_PASS_MAX_TOKENS", 100)
+    monkeypatch.setattr(config, "SUMMARIZER_CHUNK_TOKENS", 50)
+    monkeypatch.setattr(config, "SUMMARIZER_CHUNK_OVERLAP_TOKENS", 10)
+
+def _document(paragraphs=20):
+    return "\n\n".join(f"Paragraph {i} says something about topic {i}." for i in range(paragraphs))
+
+def test_chunks_respect_size_and_overlap_limits():
+    text = _document()
+    chunks = split_into_chunks(text, chunk_tokens=40, overlap_tokens=12)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 40 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        overlap = current.split("\n\n")[0]
+        assert previous.endswith(overlap)
+        assert estimate_tokens(overlap) <= 12
+    # Nothing is lost: every paragraph appears, in order.
+    seen = [p for chunk in chunks for p in chunk.split("\n\n")]
+    assert list(dict.fromkeys(seen)) == text.split("\n\n")
+
+def test_oversized_paragraph_is_split_into_sentences_and_words():
+    text = "Short sentence. " + " ".join(["word"] * 200)
+    chunks = split_into_chunks(text, chunk_tokens=20)
+
+    assert chunks[0].startswith("Short sentence.")
+    assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+    assert sum(chunk.count("word") for chunk in chunks) == 200
+
+def test_short_text_takes_single_call(small_budgets):
+    llm = RecordingLLM(lambda text: "summary")
+
+    assert summarize_text(llm, "A short text.", "context") == "summary"
+    assert len(llm.invoked) == 1 and llm.batches == []
+    assert "context" in llm.invoked[0][0].content
+
+def test_long_text_is_mapped_then_reduced(small_budgets):
+    llm = RecordingLLM(lambda text: "part summary")
+
+    assert summarize_text(llm, _document(40)) == "part summary"
+    assert len(llm.batches) == 1 and len(llm.batches[0]) > 1
+    assert "part 1 of" in llm.batches[0][0][-1].content
+    assert "Combine them" in llm.invoked[-1][-1].content
+
+def test_summaries_still_over_budget_are_truncated(small_budgets):
+    # A model that never shrinks its input keeps the text over budget for every reduce round.
+    llm = RecordingLLM(lambda text: text)
+
+    summarize_text(llm, _document(40))
+
+    assert len(llm.batches) == MAX_REDUCE_DEPTH
+    final_text = RecordingLLM._text(llm.invoked[-1])
+    assert estimate_tokens(final_text) <= config.SUMMARIZER_SINGLE_PASS_MAX_TOKENS
+    assert final_text.endswith("[... truncated]")
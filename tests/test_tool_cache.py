@@ -0,0 +1,89 @@
+# tests/test_tool_cache.py
+import time
+
+import pytest
+
+import config
+from tool_cache import MemoryCacheBackend, SQLiteCacheBackend, ToolCache, cached_tool, make_cache_key, set_tool_cache
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def build(max_entries=10):
+        if request.param == "memory":
+            return MemoryCacheBackend(max_entries)
+        return SQLiteCacheBackend(str(tmp_path / "tool_cache.sqlite3"), max_entries)
+    return build
+
+def _counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+    return compute, calls
+
+def test_hits_after_first_call(make_backend):
+    cache = ToolCache(make_backend(), {}, 60)
+    compute, calls = _counting("result")
+
+    assert cache.get_or_compute("web_search", {"query": "Capital of  France"}, compute) == "result"
+    assert cache.get_or_compute("web_search", {"query": "capital of france"}, compute) == "result"
+    assert len(calls) == 1
+    assert cache.snapshot() == {"web_search": {"hits": 1, "misses": 1, "evictions": 0, "bypasses": 0}}
+
+def test_entries_expire_after_tool_ttl(make_backend):
+    cache = ToolCache(make_backend(), {"web_search": 0.05}, 60)
+    compute, calls = _counting("result")
+
+    cache.get_or_compute("web_search", {"query": "q"}, compute)
+    time.sleep(0.1)
+    cache.get_or_compute("web_search", {"query": "q"}, compute)
+    assert len(calls) == 2
+    assert cache.stats["web_search"].misses == 2
+
+def test_least_recently_used_entry_is_evicted(make_backend):
+    backend = make_backend(max_entries=2)
+    cache = ToolCache(backend, {}, 60)
+    for query in ("a", "b"):
+        cache.get_or_compute("web_search", {"query": query}, lambda: query)
+        time.sleep(0.01)
+    cache.get_or_compute("web_search", {"query": "a"}, lambda: "unused")
+    time.sleep(0.01)
+    cache.get_or_compute("document_summarizer", {"text": "c"}, lambda: "c")
+
+    # The eviction is counted against the tool that owned the evicted entry.
+    assert cache.stats["web_search"].evictions == 1
+    assert backend.get(make_cache_key("web_search", {"query": "b"})) is None
+    assert backend.get(make_cache_key("web_search", {"query": "a"})) == "a"
+
+def test_errors_are_not_cached(make_backend):
+    cache = ToolCache(make_backend(), {}, 60)
+    compute, calls = _counting("Error in web_search: ddg down")
+
+    cache.get_or_compute("web_search", {"query": "q"}, compute)
+    cache.get_or_compute("web_search", {"query": "q"}, compute)
+    assert len(calls) == 2
+
+def test_sqlite_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "tool_cache.sqlite3")
+    ToolCache(SQLiteCacheBackend(path, 10), {}, 60).get_or_compute("web_search", {"query": "q"}, lambda: "stored")
+
+    compute, calls = _counting("recomputed")
+    assert ToolCache(SQLiteCacheBackend(path, 10), {}, 60).get_or_compute("web_search", {"query": "q"}, compute) == "stored"
+    assert calls == []
+
+def test_bypass_arg_skips_lookup_but_stores(monkeypatch):
+    monkeypatch.setattr(config, "TOOL_CACHE_ENABLED", True)
+    cache = ToolCache(MemoryCacheBackend(10), {}, 60)
+    set_tool_cache(cache)
+    answers = iter(["first", "second", "third"])
+
+    @cached_tool("web_search", bypass_arg="fresh")
+    def search(query: str, fresh: bool = False) -> str:
+        return next(answers)
+
+    assert search("q") == "first"
+    assert search("q", fresh=True) == "second"
+    # The bypassed call refreshed the entry, and `fresh` is not part of the key.
+    assert search("q") == "second"
+    assert cache.snapshot()["web_search"] == {"hits": 1, "misses": 1, "evictions": 0, "bypasses": 1}
@@ -0,0 +1,87 @@
+# tests/test_tool_executor.py
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from tool_executor import ParallelToolNode
+
+def _step(node, *calls):
+    message = AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call-{i}"} for i, (name, args) in enumerate(calls)
+    ])
+    return node({"messages": [message]}, {})["messages"]
+
+@tool
+def echo(text: str) -> str:
+    """Returns the text after a delay that shrinks with its length."""
+    time.sleep(0.05 * (4 - len(text)))
+    return text
+
+def test_results_keep_call_order():
+    node = ParallelToolNode([echo], concurrency_limits={}, timeouts={}, default_timeout=5)
+
+    messages = _step(node, ("echo", {"text": "a"}), ("echo", {"text": "bb"}), ("echo", {"text": "ccc"}), ("nope", {}))
+
+    assert [m.content for m in messages[:3]] == ["a", "bb", "ccc"]
+    assert [m.tool_call_id for m in messages] == ["call-0", "call-1", "call-2", "call-3"]
+    assert messages[3].status == "error" and "not a valid tool" in messages[3].content
+
+def test_per_tool_concurrency_limit():
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    @tool
+    def slow(n: int) -> int:
+        """Sleeps briefly while counting concurrent calls."""
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return n
+
+    node = ParallelToolNode([slow], concurrency_limits={"slow": 2}, timeouts={}, default_timeout=5)
+    messages = _step(node, *[("slow", {"n": i}) for i in range(6)])
+
+    assert [m.content for m in messages] == [str(i) for i in range(6)]
+    assert running["max"] == 2
+
+def test_running_call_times_out_and_queued_calls_never_start():
+    ran = []
+
+    @tool
+    def sleepy(n: int) -> int:
+        """Records that it ran, then sleeps."""
+        ran.append(n)
+        time.sleep(1)
+        return n
+
+    node = ParallelToolNode([sleepy], concurrency_limits={"sleepy": 1}, timeouts={"sleepy": 0.5}, default_timeout=0.3)
+    started = time.monotonic()
+    messages = _step(node, ("sleepy", {"n": 0}), ("sleepy", {"n": 1}), ("sleepy", {"n": 2}))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.8
+    assert "timed out after 0.5s" in messages[0].content
+    assert all("no free slot" in m.content for m in messages[1:])
+    assert all(m.status == "error" for m in messages)
+    time.sleep(1.2)
+    assert ran == [0]
+
+def test_step_latency_does_not_grow_with_queued_calls():
+    @tool
+    def blocker(n: int) -> int:
+        """Sleeps longer than the slot wait."""
+        time.sleep(0.6)
+        return n
+
+    node = ParallelToolNode([blocker], concurrency_limits={"blocker": 1}, timeouts={"blocker": 5}, default_timeout=0.2)
+    started = time.monotonic()
+    messages = _step(node, *[("blocker", {"n": i}) for i in range(5)])
+
+    assert time.monotonic() - started < 1.0
+    assert messages[0].content == "0"
+    assert all("no free slot within 0.2s" in m.content for m in messages[1:])
@@ -0,0 +1,45 @@
+# tests/test_turn_runner.py
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agent_graph import create_agent_graph
+from fake_llm import ScriptedChatModel
+from turn_runner import run_turn
+
+def _initial_state(prompt):
+    return {"messages": [SystemMessage(content="system"), HumanMessage(content=prompt)]}
+
+def test_scripted_tool_turn_runs_graph_once():
+    llm = ScriptedChatModel(script=[
+        {"tool_calls": [
+            {"name": "web_search", "args": {"query": "capital of France"}},
+            {"name": "calculator", "args": {"expression": "25*76"}},
+        ]},
+        "Paris, and 25*76 is 1900.",
+    ])
+    updates = []
+    result = run_turn(create_agent_graph(llm=llm), _initial_state("Capital of France and 25*76?"),
+                      on_update=lambda node, output: updates.append(node))
+
+    assert result.llm_calls == 2
+    assert result.tool_invocations == 2
+    assert updates == ["agent", "tools", "agent"]
+    assert result.final_answer == "Paris, and 25*76 is 1900."
+    assert [tc["name"] for tc in result.tool_calls] == ["web_search", "calculator"]
+    assert [m.content for m in result.tool_results if m.name == "calculator"] == ["1900"]
+    assert [type(m) for m in result.new_messages] == [AIMessage, ToolMessage, ToolMessage, AIMessage]
+    assert len(result.final_state["messages"]) == 2 + len(result.new_messages)
+
+def test_direct_answer_makes_single_llm_call():
+    result = run_turn(create_agent_graph(llm=ScriptedChatModel(script=["Hello!"])), _initial_state("hi"))
+
+    assert result.llm_calls == 1
+    assert result.tool_invocations == 0
+    assert result.final_answer == "Hello!"
+
+def test_streamed_tokens_come_from_agent_node_only():
+    tokens = []
+    result = run_turn(create_agent_graph(llm=ScriptedChatModel(script=["streamed final answer"])),
+                      _initial_state("hi"), on_token=tokens.append)
+
+    assert "".join(tokens) == "streamed final answer"
+    assert result.time_to_first_token is not None
@@ -0,0 +1,200 @@
+# tool_cache.py
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import config
+from instrumentation import annotate_current_span
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    bypasses: int = 0
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> list:
+        """Stores a value and returns the keys evicted to stay within max_entries."""
+        evicted = []
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                evicted.append(evicted_key)
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCacheBackend:
+    """On-disk cache shared across processes/restarts, evicting least recently used rows."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tool_cache_last_access ON tool_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM tool_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE tool_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> list:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0] - self.max_entries
+            evicted = []
+            if overflow > 0:
+                evicted = [row[0] for row in self._conn.execute(
+                    "SELECT key FROM tool_cache ORDER BY last_access ASC LIMIT ?", (overflow,)
+                )]
+                self._conn.executemany("DELETE FROM tool_cache WHERE key = ?", [(k,) for k in evicted])
+            self._conn.commit()
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM tool_cache")
+            self._conn.commit()
+
+def normalize_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+def make_cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    payload = json.dumps(normalize_value(arguments), sort_keys=True, default=str)
+    return f"{tool_name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+class ToolCache:
+    def __init__(self, backend, ttls: Dict[str, float], default_ttl: float):
+        self.backend = backend
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stats: Dict[str, CacheStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, tool_name: str, field_name: str, amount: int = 1):
+        with self._stats_lock:
+            stats = self.stats.setdefault(tool_name, CacheStats())
+            setattr(stats, field_name, getattr(stats, field_name) + amount)
+
+    def get_or_compute(self, tool_name: str, arguments: Dict[str, Any], compute: Callable[[], str], bypass: bool = False) -> str:
+        key = make_cache_key(tool_name, arguments)
+        if bypass:
+            self._record(tool_name, "bypasses")
+        else:
+            cached_value = self.backend.get(key)
+            if cached_value is not None:
+                self._record(tool_name, "hits")
+                annotate_current_span(cache_hit=True)
+                return cached_value
+            self._record(tool_name, "misses")
+            annotate_current_span(cache_hit=False)
+
+        value = compute()
+        # Error strings are never cached so transient failures are retried on the next call.
+        if isinstance(value, str) and not value.startswith("Error"):
+            for evicted_key in self.backend.set(key, value, self.ttls.get(tool_name, self.default_ttl)):
+                self._record(evicted_key.split(":", 1)[0], "evictions")
+        return value
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._stats_lock:
+            return {name: asdict(stats) for name, stats in self.stats.items()}
+
+    def clear(self):
+        self.backend.clear()
+
+_tool_cache: Optional[ToolCache] = None
+_tool_cache_lock = threading.Lock()
+
+def get_tool_cache() -> ToolCache:
+    global _tool_cache
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            if config.TOOL_CACHE_BACKEND == "sqlite":
+                backend = SQLiteCacheBackend(config.TOOL_CACHE_SQLITE_PATH, config.TOOL_CACHE_MAX_ENTRIES)
+            else:
+                backend = MemoryCacheBackend(config.TOOL_CACHE_MAX_ENTRIES)
+            _tool_cache = ToolCache(backend, config.TOOL_CACHE_TTL_SECONDS, config.TOOL_CACHE_DEFAULT_TTL_SECONDS)
+        return _tool_cache
+
+def set_tool_cache(cache: Optional[ToolCache]):
+    """Replaces the process-wide cache (e.g. with a fresh in-memory one in tests)."""
+    global _tool_cache
+    with _tool_cache_lock:
+        _tool_cache = cache
+
+def cached_tool(tool_name: str, bypass_arg: Optional[str] = None):
+    """
+    Caches a tool function's string result keyed on its normalized arguments.
+    If `bypass_arg` names a boolean parameter, passing it as True skips the lookup (the fresh
+    result is still stored). Apply it beneath @tool so the tool schema is unchanged.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not config.TOOL_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            bypass = bool(arguments.pop(bypass_arg, False)) if bypass_arg else False
+            return get_tool_cache().get_or_compute(tool_name, arguments, lambda: func(*args, **kwargs), bypass=bypass)
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+# tool_executor.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from typing import Dict, Optional, Sequence
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+import config
+from instrumentation import get_tracer, payload_size, traced_node
+
+def is_error_result(message: ToolMessage) -> bool:
+    """Whether a tool result is a failure; the tools in tools_definition.py return "Error ..." strings instead of raising."""
+    return message.status == "error" or (isinstance(message.content, str) and message.content.startswith("Error"))
+
+def _as_tool_message(result, tool_call: dict) -> ToolMessage:
+    if not isinstance(result, ToolMessage):
+        result = ToolMessage(content=str(result), name=tool_call["name"], tool_call_id=tool_call["id"])
+    if result.status != "error" and is_error_result(result):
+        result = result.model_copy(update={"status": "error"})
+    return result
+
+class ParallelToolNode:
+    """
+    Graph node that runs all tool calls of the last AIMessage concurrently on a shared thread pool.
+    Per-tool semaphores cap how many calls of one tool run at once across every session
+    (tools without a limit are only bounded by the pool size). Calls that get no slot within
+    `default_timeout` of the step starting are abandoned without running; the others each have a
+    timeout from when they started. ToolMessages are returned in the original call order.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        max_workers: Optional[int] = None,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+    ):
+        self.tools_by_name = {t.name: t for t in tools}
+        self.timeouts = config.TOOL_TIMEOUT_SECONDS if timeouts is None else timeouts
+        self.default_timeout = config.TOOL_DEFAULT_TIMEOUT_SECONDS if default_timeout is None else default_timeout
+        limits = config.TOOL_CONCURRENCY_LIMITS if concurrency_limits is None else concurrency_limits
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items() if limit}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.TOOL_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="agent-tool",
+        )
+
+    def _run_tool_call(self, tool_call: dict, config: RunnableConfig, slot_deadline: float, started: dict) -> Optional[ToolMessage]:
+        tool = self.tools_by_name[tool_call["name"]]
+        semaphore = self._semaphores.get(tool_call["name"])
+        if semaphore is not None and not semaphore.acquire(timeout=max(slot_deadline - time.monotonic(), 0)):
+            return None
+        with started["lock"]:
+            # The step may already have given up on this call; an abandoned call must never start.
+            if started["cancelled"]:
+                if semaphore is not None:
+                    semaphore.release()
+                return None
+            started["at"] = time.monotonic()
+        started["event"].set()
+        try:
+            tracer = get_tracer()
+            if tracer.enabled:
+                with tracer.span(tool_call["name"], "tool", tool_call["args"]) as span:
+                    result = _as_tool_message(tool.invoke({**tool_call, "type": "tool_call"}, config), tool_call)
+                    span.output_size = payload_size(result)
+                    if result.status == "error":
+                        span.error = str(result.content)[:500]
+            else:
+                result = _as_tool_message(tool.invoke({**tool_call, "type": "tool_call"}, config), tool_call)
+        except Exception as e:
+            return ToolMessage(
+                content=f"Error: {repr(e)}\n Please fix your mistakes.",
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        return result
+
+    @traced_node("tools")
+    def __call__(self, state: dict, config: RunnableConfig) -> dict:
+        last_message = state["messages"][-1]
+        tool_calls = last_message.tool_calls if isinstance(last_message, AIMessage) else []
+        # Tools that remember what they returned (web_search dedup) need to know which turn this is.
+        turn_index = sum(isinstance(m, HumanMessage) for m in state["messages"])
+        config = {**config, "configurable": {**(config.get("configurable") or {}), "turn_index": turn_index}}
+
+        # Waiting for a concurrency slot is bounded by one deadline for the whole step, so queued calls
+        # don't add up; each call's own timeout starts once it holds its slot.
+        slot_deadline = time.monotonic() + self.default_timeout
+        pending = []
+        for tool_call in tool_calls:
+            if tool_call["name"] not in self.tools_by_name:
+                pending.append((tool_call, None, None))
+                continue
+            started = {"lock": threading.Lock(), "event": threading.Event(), "at": None, "cancelled": False}
+            # copy_context() keeps context variables (tracing, callbacks) visible inside the worker thread.
+            future = self._executor.submit(
+                copy_context().run, self._run_tool_call, tool_call, config, slot_deadline, started
+            )
+            pending.append((tool_call, future, started))
+
+        messages = []
+        for tool_call, future, started in pending:
+            if future is None:
+                messages.append(ToolMessage(
+                    content=f"Error: {tool_call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}].",
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                ))
+                continue
+            if not started["event"].wait(max(slot_deadline - time.monotonic(), 0)):
+                with started["lock"]:
+                    started["cancelled"] = started["at"] is None
+                if started["cancelled"]:
+                    messages.append(ToolMessage(
+                        content=f"Error: {tool_call['name']} did not start, no free slot within {self.default_timeout}s.",
+                        name=tool_call["name"],
+                        tool_call_id=tool_call["id"],
+                        status="error",
+                    ))
+                    continue
+            timeout = self.timeouts.get(tool_call["name"], self.default_timeout)
+            try:
+                messages.append(future.result(timeout=max(started["at"] + timeout - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                # A running call can't be interrupted; its result is discarded and its slot freed when it returns.
+                messages.append(ToolMessage(
+                    content=f"Error: {tool_call['name']} timed out after {timeout}s.",
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                ))
+        return {"messages": messages}
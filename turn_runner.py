@@ -0,0 +1,159 @@
+# turn_runner.py
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agent_graph import AgentState
+from instrumentation import get_tracer, payload_size
+
+DEFAULT_RECURSION_LIMIT = 15
+
+class InvocationCounter(BaseCallbackHandler):
+    """Counts LLM and tool invocations made while the graph runs one turn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.tool_calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.llm_calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        with self._lock:
+            self.llm_calls += 1
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        with self._lock:
+            self.tool_calls += 1
+
+@dataclass
+class TurnResult:
+    final_state: AgentState
+    final_answer: str = ""
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    tool_results: List[ToolMessage] = field(default_factory=list)
+    new_messages: List[BaseMessage] = field(default_factory=list)
+    llm_calls: int = 0
+    tool_invocations: int = 0
+    time_to_first_token: Optional[float] = None
+    cache_hit: Optional[str] = None  # "exact" or "semantic" when answered from the response cache
+
+def _opening_prompt(graph, messages: List[BaseMessage], run_config: dict, uses_checkpoint: bool) -> Optional[str]:
+    """The user's prompt if this turn opens a conversation (the only turns the response cache serves), else None."""
+    conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+    if len(conversation) != 1 or not isinstance(conversation[0], HumanMessage) or not isinstance(conversation[0].content, str):
+        return None
+    if uses_checkpoint and graph.get_state(run_config).values.get("messages"):
+        return None
+    return conversation[0].content
+
+def run_turn(
+    graph,
+    initial_state: AgentState,
+    on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+    configurable: Optional[Dict[str, Any]] = None,
+    callbacks: Optional[List[BaseCallbackHandler]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    response_cache=None,
+) -> TurnResult:
+    """
+    Runs the agent graph exactly once for a single user turn.
+    The stream of node updates is consumed a single time: every update is passed to `on_update`
+    (e.g. to drive a live status box) and folded into the final AgentState, so no second
+    `invoke` is needed to recover the answer.
+    `configurable` is passed through to the graph, e.g. {"conversation_memory": ConversationMemory()},
+    and `callbacks` are extra LangChain callback handlers attached to the run. For a graph compiled
+    with a checkpointer, pass {"thread_id": ...} and only the turn's new messages as `initial_state`.
+    Answer tokens produced by the agent node are passed to `on_token` as they are generated, and the
+    delay until the first one is reported as `time_to_first_token` (seconds).
+    With a `response_cache` (see response_cache.py), the opening turn of a conversation is answered
+    from the cache when a matching prompt was answered before, reported to `on_update` as the
+    'response_cache' node; otherwise the answer is stored after the run.
+    """
+    counter = InvocationCounter()
+    run_config = {"recursion_limit": recursion_limit, "callbacks": [counter] + list(callbacks or [])}
+    if configurable:
+        run_config["configurable"] = dict(configurable)
+    messages = list(initial_state["messages"])
+    new_messages: List[BaseMessage] = []
+    uses_checkpoint = getattr(graph, "checkpointer", None) is not None and "thread_id" in run_config.get("configurable", {})
+    cache_prompt = _opening_prompt(graph, messages, run_config, uses_checkpoint) if response_cache is not None else None
+
+    time_to_first_token = None
+    cache_hit = None
+    tracer = get_tracer()
+    started = time.perf_counter()
+    with (tracer.span("turn", "turn", initial_state) if tracer.enabled else nullcontext()) as turn_span:
+        if cache_prompt is not None:
+            cached_answer, cache_hit = response_cache.lookup(cache_prompt)
+        if cache_hit:
+            new_messages.append(AIMessage(content=cached_answer))
+            time_to_first_token = time.perf_counter() - started
+            if on_token is not None:
+                on_token(cached_answer)
+            if on_update is not None:
+                on_update("response_cache", {"messages": list(new_messages)})
+            if uses_checkpoint:
+                # Record the turn in the thread as if the agent had answered it.
+                graph.update_state(run_config, {"messages": messages + new_messages}, as_node="agent")
+        stream = () if cache_hit else graph.stream(initial_state, run_config, stream_mode=["updates", "messages"])
+        for stream_mode, payload in stream:
+            if stream_mode == "messages":
+                message_chunk, metadata = payload
+                # Only the agent's own LLM output is user-facing; LLM calls inside tools are skipped.
+                if metadata.get("langgraph_node") == "agent" and isinstance(message_chunk.content, str) and message_chunk.content:
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - started
+                    if on_token is not None:
+                        on_token(message_chunk.content)
+                continue
+            for node_name, output_data in payload.items():
+                if on_update is not None:
+                    on_update(node_name, output_data)
+                if isinstance(output_data, dict) and "messages" in output_data:
+                    new_messages.extend(output_data["messages"])
+        if turn_span is not None:
+            turn_span.output_size = payload_size(new_messages)
+            turn_span.attributes.update({"llm_calls": counter.llm_calls, "tool_calls": counter.tool_calls})
+            if time_to_first_token is not None:
+                turn_span.attributes["time_to_first_token_ms"] = round(time_to_first_token * 1000, 3)
+            if cache_prompt is not None:
+                turn_span.attributes["response_cache"] = cache_hit or "miss"
+
+    if uses_checkpoint:
+        # The input only carried this turn's messages; the full history lives in the checkpoint.
+        messages = list(graph.get_state(run_config).values.get("messages", []))
+    else:
+        messages.extend(new_messages)
+    result = TurnResult(
+        final_state={"messages": messages},
+        new_messages=new_messages,
+        llm_calls=counter.llm_calls,
+        tool_invocations=counter.tool_calls,
+        time_to_first_token=time_to_first_token,
+        cache_hit=cache_hit,
+    )
+    for msg_obj in new_messages:
+        if isinstance(msg_obj, AIMessage) and msg_obj.tool_calls:
+            result.tool_calls.extend(msg_obj.tool_calls)
+        elif isinstance(msg_obj, ToolMessage):
+            result.tool_results.append(msg_obj)
+
+    if new_messages:
+        last_msg_in_turn = new_messages[-1]
+        if isinstance(last_msg_in_turn, AIMessage) and (not last_msg_in_turn.tool_calls or last_msg_in_turn.content):
+            result.final_answer = last_msg_in_turn.content
+            if cache_prompt is not None and not cache_hit and not last_msg_in_turn.tool_calls:
+                tool_failed = any(
+                    m.status == "error" or str(m.content).startswith("Error") for m in result.tool_results
+                )
+                response_cache.store(cache_prompt, result.final_answer, result.tool_calls, tool_failed=tool_failed)
+    return result